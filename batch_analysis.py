@@ -0,0 +1,220 @@
+"""Consolidated metrics for any number of simulation run files.
+
+    python batch_analysis.py runs/ 'archive/**/*.csv' -j 8 -o fleet_metrics.csv
+
+Inputs are directories (every *.csv, *.csv.gz, *.csv.xz and binary *.vsr
+run inside; with --recursive, also in subdirectories), glob patterns or
+plain file names. Each run is read in constant-memory chunks by a bounded pool of worker processes and reduced
+to one row of the metrics table. The table records every source file's
+mtime and size, so a later run over the same inputs only re-reads files
+that are new or have changed since and reuses the rows of the others.
+"""
+import argparse
+import csv
+import fnmatch
+import glob
+import multiprocessing
+import os
+import vehicle_analysis as analysis
+from run_format import RUN_EXTENSION, check_run_source, is_run_file, iter_run_chunks
+from simulation_data import COLUMNS, CSV_EXTENSIONS, open_csv
+
+DEFAULT_OUTPUT = "batch_metrics.csv"
+RUN_FILE_PATTERNS = tuple("*" + extension for extension in CSV_EXTENSIONS + (RUN_EXTENSION,))
+# Tables written by vehicle_analysis, parameter_sweep and this module
+OUTPUT_PATTERNS = (
+    "correlation_matrix_*.csv", "scenario_comparison_pairwise*.csv", "parameter_sweep*.csv",
+    DEFAULT_OUTPUT
+)
+
+SOURCE_FIELDS = ('path', 'mtime_ns', 'size')
+METRIC_FIELDS = (
+    'rows', 'distance_km', 'duration_s', 'total_fuel', 'fuel_per_100km',
+    'energy_efficiency', 'cost', 'co2',
+    'speed_mean', 'speed_median', 'speed_std', 'speed_min', 'speed_max',
+    'max_drag', 'drag_percentage', 'rolling_percentage', 'slope_percentage',
+    'altitude_change'
+)
+BATCH_FIELDS = SOURCE_FIELDS + METRIC_FIELDS
+
+def find_run_files(inputs, recursive=False, patterns=RUN_FILE_PATTERNS, exclude=()):
+    """Absolute paths of every run file named by `inputs`, sorted and without duplicates.
+
+    The tables the analysis tools write beside the runs (OUTPUT_PATTERNS)
+    and paths in `exclude` are skipped silently; any other file that is
+    not a simulation run is skipped with a warning.
+    """
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            folder = os.path.join(entry, "**") if recursive else entry
+            entries = [os.path.join(folder, pattern) for pattern in patterns]
+        else:
+            entries = [entry]
+        for entry in entries:
+            matches = glob.glob(entry, recursive=True) if glob.has_magic(entry) else [entry]
+            for match in matches:
+                if os.path.isfile(match):
+                    paths.add(os.path.abspath(match))
+                elif not glob.has_magic(entry):
+                    print(f"WARNING: {match} not found, skipped.")
+    paths = (path for path in paths.difference(exclude) if not is_output_file(path))
+    return sorted(path for path in paths if is_run_source(path))
+
+def is_output_file(path):
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in OUTPUT_PATTERNS)
+
+def is_run_source(path):
+    """Whether `path` is a binary run or a CSV whose header is exactly COLUMNS"""
+    try:
+        check_run_source(path)
+        if not is_run_file(path):
+            with open_csv(path) as file:
+                header = file.readline().strip().split(',')
+            if header != list(COLUMNS):
+                raise ValueError(f"header is '{','.join(header)[:80]}'")
+    except (OSError, ValueError) as e:
+        print(f"WARNING: {path} is not a run file, skipped: {e}")
+        return False
+    return True
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def summarize_run(path):
+    """One row of BATCH_FIELDS for the run file at `path`"""
+    mtime_ns, size = file_signature(path)
+    summary = analysis.StreamingSummary()
+    for chunk in iter_run_chunks(path):
+        summary.update(chunk)
+    if summary.count == 0:
+        raise ValueError("no data rows")
+
+    metrics = analysis.collect_detailed_statistics(summary)
+    distance = metrics['distance']
+    cumulative_fuel = metrics['cumulative_fuel']
+    speed_stats = metrics['speed_stats']
+    breakdown = metrics['resistance_breakdown'] or dict.fromkeys(
+        ('drag_percentage', 'rolling_percentage', 'slope_percentage'), 0.0
+    )
+    time_stats = summary.column_statistics('time')
+    return {
+        'path': path,
+        'mtime_ns': mtime_ns,
+        'size': size,
+        'rows': summary.count,
+        'distance_km': distance / 1000,
+        'duration_s': time_stats['range'],
+        'total_fuel': cumulative_fuel[-1],
+        'fuel_per_100km': analysis.calculate_average_fuel_consumption(cumulative_fuel, distance),
+        'energy_efficiency': analysis.calculate_energy_efficiency(cumulative_fuel, distance),
+        'cost': analysis.calculate_cost_estimation(cumulative_fuel),
+        'co2': analysis.calculate_co2_emissions(cumulative_fuel),
+        'speed_mean': speed_stats['mean'],
+        'speed_median': speed_stats['median'],
+        'speed_std': speed_stats['std'],
+        'speed_min': speed_stats['min'],
+        'speed_max': speed_stats['max'],
+        'max_drag': metrics['drag_stats']['max'],
+        'drag_percentage': breakdown['drag_percentage'],
+        'rolling_percentage': breakdown['rolling_percentage'],
+        'slope_percentage': breakdown['slope_percentage'],
+        'altitude_change': metrics['altitude_stats']['range'],
+    }
+
+def summarize_run_safely(path):
+    """(path, row, error message) so one bad file does not stop the batch"""
+    try:
+        return path, summarize_run(path), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+def load_batch_table(filename):
+    """Rows of an existing metrics table keyed by path, or {} if there is none"""
+    try:
+        with open(filename, "r", newline="") as file:
+            reader = csv.DictReader(file)
+            if tuple(reader.fieldnames or ()) != BATCH_FIELDS:
+                return {}
+            return dict((row['path'], row) for row in reader)
+    except FileNotFoundError:
+        return {}
+
+def save_batch_table(rows, filename):
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(
+                (name, f"{value:.6g}" if isinstance(value, float) else value)
+                for name, value in row.items()
+            ))
+    os.replace(temporary, filename)
+
+def is_up_to_date(row, path):
+    if row is None:
+        return False
+    try:
+        mtime_ns, size = file_signature(path)
+    except FileNotFoundError:
+        return False
+    return row['mtime_ns'] == str(mtime_ns) and row['size'] == str(size)
+
+def run_batch(inputs, output=DEFAULT_OUTPUT, workers=1, recursive=False, force=False):
+    """Summarize every run named by `inputs` into the metrics table at `output`.
+
+    Returns (rows written, runs analyzed, runs reused, runs failed).
+    """
+    paths = find_run_files(inputs, recursive, exclude=(os.path.abspath(output),))
+    previous = {} if force else load_batch_table(output)
+    rows = {}
+    pending = []
+    for path in paths:
+        if is_up_to_date(previous.get(path), path):
+            rows[path] = previous[path]
+        else:
+            pending.append(path)
+    reused = len(rows)
+    print(f"Found {len(paths)} run file(s): {len(pending)} to analyze, {reused} up to date")
+
+    if workers > 1 and len(pending) > 1:
+        with multiprocessing.Pool(min(workers, len(pending))) as pool:
+            failed = collect_results(pool.imap_unordered(summarize_run_safely, pending, chunksize=4), rows, len(pending))
+    else:
+        failed = collect_results(map(summarize_run_safely, pending), rows, len(pending))
+
+    save_batch_table([rows[path] for path in sorted(rows)], output)
+    print(f"Metrics for {len(rows)} run(s) saved to: {output}")
+    return len(rows), len(pending) - failed, reused, failed
+
+def collect_results(results, rows, total):
+    """Store finished (path, row, error) results in `rows`; returns the number that failed"""
+    failed = 0
+    for index, (path, row, error) in enumerate(results, 1):
+        if error is not None:
+            print(f"ERROR: Could not analyze {path}: {error}")
+            failed += 1
+        else:
+            rows[path] = row
+        if index % 100 == 0 or index == total:
+            print(f"Analyzed {index}/{total}")
+    return failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write one metrics table for many simulation run files")
+    parser.add_argument("inputs", nargs='+', help="run files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes (0 = one per CPU core)"
+    )
+    parser.add_argument("-r", "--recursive", action="store_true", help="also search subdirectories")
+    parser.add_argument("--force", action="store_true", help="re-analyze runs that are already up to date")
+    args = parser.parse_args(argv)
+    run_batch(args.inputs, args.output, args.jobs or os.cpu_count(), args.recursive, args.force)
+
+if __name__ == "__main__":
+    main()
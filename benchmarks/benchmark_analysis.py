@@ -0,0 +1,231 @@
+"""Scaling benchmarks for the simulation engine and the analysis hot paths.
+
+    python benchmarks/benchmark_analysis.py run -o results.json
+    python benchmarks/benchmark_analysis.py compare baseline.json results.json
+
+`run` generates runSimulation-format CSVs for every built-in scenario at
+each requested row count with the in-process engine, then records the best
+per-call wall time over `--repeat` samples and the peak traced allocation
+of one extra call for each function. `compare` matches two result files on
+(function, scenario, rows) and exits with status 1 if any benchmark got
+slower or used more memory than the given tolerances allow.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import run_metrics
+import vehicle_analysis as analysis
+import vehicle_engine
+from dataset_cache import dataset_cache
+from simulation_data import save_csv_file
+
+DEFAULT_ROWS = [1000, 10000, 100000, 1000000]
+DEFAULT_REPEAT = 3
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+MIN_SAMPLE_SECONDS = 0.05
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the report output of the analysis functions"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def trip_for_rows(rows, speed_kmh=vehicle_engine.DEFAULT_PARAMETERS['speed']):
+    """Trip distance (km) whose simulation has exactly `rows` timesteps"""
+    return (rows + 0.5) * speed_kmh / 3600.0
+
+def generate_run(scenario, rows, directory):
+    """Simulate a scenario with `rows` timesteps and write it as a runSimulation CSV"""
+    data = vehicle_engine.simulate(dict(vehicle_engine.DEFAULT_PARAMETERS, distance=trip_for_rows(rows)), scenario)
+    filename = os.path.join(directory, f"scenario_{scenario}_{rows}.csv")
+    save_csv_file(data, filename)
+    return filename
+
+def timed_call(function, setup=None):
+    if setup:
+        setup()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    plt.close("all")
+    return elapsed
+
+def measure(function, setup=None, repeat=DEFAULT_REPEAT):
+    """Best per-call wall time over `repeat` samples and the peak traced allocation of one more call.
+
+    Each sample averages as many calls as fit in MIN_SAMPLE_SECONDS, so
+    sub-millisecond functions are not dominated by timer noise.
+    """
+    best = float("inf")
+    with quiet():
+        for _ in range(repeat):
+            calls = 0
+            elapsed = 0.0
+            while calls == 0 or elapsed < MIN_SAMPLE_SECONDS:
+                elapsed += timed_call(function, setup)
+                calls += 1
+            best = min(best, elapsed / calls)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            plt.close("all")
+    return best, peak
+
+def benchmark_cases(scenario, rows, filename):
+    """(name, function, setup) for every per-run benchmark of one scenario.
+
+    Cases that read the run's memoized metrics drop them before every
+    call, so each repeat times the calculation rather than a cache hit.
+    """
+    params = dict(vehicle_engine.DEFAULT_PARAMETERS, distance=trip_for_rows(rows))
+    scenario_name = f"Scenario_{scenario}"
+    with quiet():
+        data = analysis.load_csv_file(filename)
+    return [
+        ("simulate", lambda: vehicle_engine.simulate(params, scenario), None),
+        ("load_csv_file", lambda: analysis.load_csv_file(filename), dataset_cache.clear),
+        ("calculate_basic_statistics", lambda: run_metrics.calculate_basic_statistics(data.fuel), None),
+        ("find_peak_consumption_period", lambda: run_metrics.find_peak_consumption_period(data.fuel, data.time), None),
+        ("calculate_correlation", lambda: analysis.calculate_correlation(data.speed, data.drag), None),
+        ("plot_comprehensive_analysis", lambda: analysis.plot_comprehensive_analysis(data, scenario_name),
+         data.metrics.invalidate),
+    ]
+
+def invalidate_metrics(runs):
+    for _, data in runs:
+        data.metrics.invalidate()
+
+def run_benchmarks(rows_list, repeat=DEFAULT_REPEAT, data_dir=None):
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = data_dir or scratch
+        os.makedirs(data_dir, exist_ok=True)
+        cwd = os.getcwd()
+        os.chdir(scratch)  # the plotting functions save their figures to the working directory
+        try:
+            for rows in rows_list:
+                runs = []
+                for scenario in vehicle_engine.SCENARIOS:
+                    filename = generate_run(scenario, rows, data_dir)
+                    for name, function, setup in benchmark_cases(scenario, rows, filename):
+                        seconds, peak = measure(function, setup, repeat)
+                        results.append({
+                            'function': name, 'scenario': scenario, 'rows': rows,
+                            'seconds': seconds, 'peak_bytes': peak
+                        })
+                        print(f"{name:30s} scenario {scenario} {rows:>9d} rows  "
+                              f"{seconds * 1000:10.2f} ms  {peak / 1024 / 1024:9.2f} MB")
+                    with quiet():
+                        runs.append((f"Scenario_{scenario}", analysis.load_csv_file(filename)))
+
+                seconds, peak = measure(
+                    lambda: analysis.compare_scenarios(runs), lambda: invalidate_metrics(runs), repeat
+                )
+                results.append({
+                    'function': 'compare_scenarios', 'scenario': 'all', 'rows': rows,
+                    'seconds': seconds, 'peak_bytes': peak
+                })
+                print(f"{'compare_scenarios':30s} scenario - {rows:>9d} rows  "
+                      f"{seconds * 1000:10.2f} ms  {peak / 1024 / 1024:9.2f} MB")
+                dataset_cache.clear()
+        finally:
+            os.chdir(cwd)
+
+    return {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare_results(baseline, current, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Print a comparison table and return the list of regressed benchmark keys"""
+    def key(entry):
+        return (entry['function'], str(entry['scenario']), entry['rows'])
+
+    previous = dict((key(entry), entry) for entry in baseline['results'])
+    regressions = []
+    for entry in current['results']:
+        old = previous.get(key(entry))
+        if old is None:
+            continue
+        time_ratio = entry['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        memory_ratio = entry['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] else 1.0
+        flags = []
+        if time_ratio > 1.0 + time_tolerance:
+            flags.append("SLOWER")
+        if memory_ratio > 1.0 + memory_tolerance:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(key(entry))
+        print(f"{entry['function']:30s} scenario {entry['scenario']!s:3s} {entry['rows']:>9d} rows  "
+              f"time x{time_ratio:6.2f}  memory x{memory_ratio:6.2f}  {' '.join(flags)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and analysis hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and save the results as JSON")
+    run_parser.add_argument("--rows", type=int, nargs='+', default=DEFAULT_ROWS)
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--data-dir", help="keep the generated CSV files in this directory")
+    run_parser.add_argument("-o", "--output", default="benchmark_results.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                                help="allowed fractional slowdown (default 0.25)")
+    compare_parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                                help="allowed fractional growth in peak memory (default 0.10)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.rows, args.repeat, args.data_dir)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to: {args.output}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare_results(baseline, current, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) found")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
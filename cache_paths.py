@@ -0,0 +1,11 @@
+"""Directory under which the simulation caches keep their files.
+
+Set VEHICLE_SIM_CACHE_DIR to move it; result_cache stores runs at its
+top level and route_profiles converted routes in its routes/ folder.
+"""
+import os
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VEHICLE_SIM_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "vehicle_simulation")
+)
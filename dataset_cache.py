@@ -0,0 +1,92 @@
+"""Process-wide cache of parsed simulation runs.
+
+Entries are keyed on the absolute path and validated against the file's
+mtime and size, so a run is parsed again only after the file changes.
+Binary run files are memory-mapped rather than parsed (run_format).
+The least recently used entries are evicted once the cached column
+tables exceed the memory budget. Cached arrays are read-only because
+every caller shares them.
+"""
+import os
+import threading
+from collections import OrderedDict
+from run_format import load_run
+from simulation_data import COLUMNS
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+class DatasetCache:
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, loader=load_run):
+        self.memory_budget = memory_budget
+        self.loader = loader
+        self.entries = OrderedDict()
+        self.memory_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, filename):
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        data = self.loader(path)
+        self.put(path, data, signature)
+        return data
+
+    def cached(self, filename):
+        """The cached run for `filename` if it is still current, without loading it otherwise"""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+                return entry[1]
+        return None
+
+    def put(self, filename, data, signature=None):
+        path = os.path.abspath(filename)
+        if signature is None:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        data.table.flags.writeable = False
+        for name in COLUMNS:
+            # The column attributes are views made before the table was frozen
+            getattr(data, name).flags.writeable = False
+        size = data.table.nbytes
+
+        with self.lock:
+            self.discard_entry(path)
+            if size > self.memory_budget:
+                return
+            while self.entries and self.memory_used + size > self.memory_budget:
+                self.discard_entry(next(iter(self.entries)))
+            self.entries[path] = (signature, data, size)
+            self.memory_used += size
+
+    def discard_entry(self, path):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.memory_used -= entry[2]
+
+    def invalidate(self, filename):
+        with self.lock:
+            self.discard_entry(os.path.abspath(filename))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.memory_used = 0
+
+dataset_cache = DatasetCache()
+
+def load_dataset(filename):
+    return dataset_cache.get(filename)
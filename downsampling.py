@@ -0,0 +1,101 @@
+"""Reduce long series to about the pixel width of the axes they are drawn on.
+
+Min/max decimation keeps the smallest and largest sample of every bucket,
+so peaks and troughs survive exactly; Largest-Triangle-Three-Buckets keeps
+one visually representative point per bucket. Both always keep the first
+and last sample, and both assume x is monotonic.
+
+Scatter plots of one column against another have no x order; grid
+decimation keeps one sample per occupied pixel-sized cell instead, so the
+drawn cloud, outliers included, looks the same.
+"""
+import numpy as np
+
+POINTS_PER_PIXEL = 2
+
+def minmax_downsample(x, y, n_out):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    size = len(y)
+    if n_out >= size or n_out < 4:
+        return x, y
+    bucket = -(-size // (n_out // 2))
+    buckets = -(-size // bucket)
+    padding = buckets * bucket - size
+    offsets = np.arange(buckets) * bucket
+    lows = np.concatenate((y, np.full(padding, np.inf))).reshape(buckets, bucket).argmin(axis=1)
+    highs = np.concatenate((y, np.full(padding, -np.inf))).reshape(buckets, bucket).argmax(axis=1)
+    keep = np.unique(np.concatenate(([0, size - 1], lows + offsets, highs + offsets)))
+    return x[keep], y[keep]
+
+def lttb_downsample(x, y, n_out):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(y)
+    if n_out >= size or n_out < 3:
+        return x, y
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = size - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else size
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        keep[i + 1] = selected
+    return x[keep], y[keep]
+
+DOWNSAMPLERS = {
+    'minmax': minmax_downsample,
+    'lttb': lttb_downsample,
+}
+
+def downsample(x, y, n_out, method='minmax'):
+    return DOWNSAMPLERS[method](x, y, n_out)
+
+def axes_point_budget(ax, dpi=None):
+    """Number of points worth drawing across the width of `ax` at `dpi`"""
+    width = ax.get_window_extent().width
+    if dpi is not None:
+        width *= dpi / ax.figure.dpi
+    return max(4, int(width * POINTS_PER_PIXEL))
+
+def grid_downsample(x, y, columns, rows):
+    """The first sample in each occupied cell of a columns x rows grid over the extent of (x, y), in input order"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(finite) <= columns * rows:
+        return x[finite], y[finite]
+    cells = np.zeros(len(finite), dtype=np.int64)
+    for values, count in ((x[finite], columns), (y[finite], rows)):
+        low, span = values.min(), np.ptp(values)
+        index = ((values - low) * (count / span)).astype(np.int64) if span else 0
+        cells = cells * count + np.minimum(index, count - 1)
+    _, first = np.unique(cells, return_index=True)
+    keep = finite[np.sort(first)]
+    return x[keep], y[keep]
+
+def axes_pixel_grid(ax, dpi=None):
+    """(columns, rows) of pixels covered by `ax` at `dpi`"""
+    extent = ax.get_window_extent()
+    scale = 1.0 if dpi is None else dpi / ax.figure.dpi
+    return max(1, int(extent.width * scale)), max(1, int(extent.height * scale))
+
+def plot_downsampled(ax, x, y, *args, full_resolution=False, method='minmax', dpi=None, **kwargs):
+    if not full_resolution:
+        x, y = downsample(x, y, axes_point_budget(ax, dpi), method)
+    return ax.plot(x, y, *args, **kwargs)
+
+def plot_scatter_downsampled(ax, x, y, *args, full_resolution=False, dpi=None, **kwargs):
+    """ax.plot of unordered (x, y) samples, with at most one marker per pixel"""
+    if not full_resolution:
+        x, y = grid_downsample(x, y, *axes_pixel_grid(ax, dpi))
+    return ax.plot(x, y, *args, **kwargs)
@@ -0,0 +1,154 @@
+"""Opt-in timing and memory spans with a Chrome trace export.
+
+Set VEHICLE_SIM_TRACE=trace.json (or pass --trace to the analysis script)
+to record a span around every instrumented stage: wall time, CPU time of
+the calling thread and how far the tracemalloc peak rose above the memory
+in use when the span started. At exit a per-stage summary table is
+printed and the spans are written in Chrome trace event format, which
+chrome://tracing and Perfetto open directly. With tracing off, traced
+functions are called straight through.
+
+tracemalloc is process-wide, so the peak of a span that overlaps work on
+another thread includes that thread's allocations too. Its peak is only
+read and reset under the tracer's lock, with the peak folded into every
+open span first, so spans on the GUI worker and Tk threads do not lose
+each other's peaks.
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+TRACE_ENV_VAR = "VEHICLE_SIM_TRACE"
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.output = None
+        self.spans = []
+        self.lock = threading.Lock()
+        self.open_spans = {}
+
+    def enable(self, output=None):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+        self.output = output
+
+    def track_peak(self):
+        """Fold the tracemalloc peak since the last reset into every open span, then reset it.
+
+        Called with the lock held at every span boundary on any thread, so
+        no open span misses a peak when another thread resets it.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        for record in self.open_spans.values():
+            record['peak'] = max(record['peak'], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+
+        with self.lock:
+            current = self.track_peak()
+            record = {'memory': current, 'peak': current}
+            self.open_spans[id(record)] = record
+        start = time.perf_counter_ns()
+        cpu_start = time.thread_time_ns()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter_ns() - start
+            cpu = time.thread_time_ns() - cpu_start
+            with self.lock:
+                self.track_peak()
+                del self.open_spans[id(record)]
+                self.spans.append({
+                    'name': name,
+                    'args': args,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'start_us': start // 1000,
+                    'wall_us': wall // 1000,
+                    'cpu_us': cpu // 1000,
+                    'peak_bytes': record['peak'] - record['memory'],
+                })
+
+    def take_spans(self):
+        """Remove and return the recorded spans (used to ship them out of worker processes)"""
+        with self.lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def add_spans(self, spans):
+        with self.lock:
+            self.spans.extend(spans)
+
+    def summary(self):
+        """(name, calls, wall ms, cpu ms, max peak bytes) per span name, in first-seen order"""
+        rows = {}
+        for span in self.spans:
+            row = rows.setdefault(span['name'], [span['name'], 0, 0.0, 0.0, 0])
+            row[1] += 1
+            row[2] += span['wall_us'] / 1000.0
+            row[3] += span['cpu_us'] / 1000.0
+            row[4] = max(row[4], span['peak_bytes'])
+        return [tuple(row) for row in rows.values()]
+
+    def print_summary(self):
+        print(f"\n{'Stage':40s} {'Calls':>6s} {'Wall (ms)':>12s} {'CPU (ms)':>12s} {'Peak (MB)':>10s}")
+        print("-" * 84)
+        for name, calls, wall, cpu, peak in self.summary():
+            print(f"{name:40s} {calls:6d} {wall:12.2f} {cpu:12.2f} {peak / 1024 / 1024:10.2f}")
+
+    def write_trace(self, filename):
+        events = []
+        for span in self.spans:
+            args = dict(span['args'])
+            args['cpu_ms'] = span['cpu_us'] / 1000.0
+            args['peak_bytes'] = span['peak_bytes']
+            events.append({
+                'name': span['name'], 'ph': 'X',
+                'ts': span['start_us'], 'dur': span['wall_us'],
+                'pid': span['pid'], 'tid': span['tid'],
+                'args': args,
+            })
+        with open(filename, "w") as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def finish(self):
+        if not self.enabled or not self.spans:
+            return
+        self.print_summary()
+        if self.output:
+            self.write_trace(self.output)
+            print(f"Trace saved to: {self.output}")
+
+tracer = Tracer()
+span = tracer.span
+
+def enable_tracing(output=None):
+    tracer.enable(output)
+
+def traced(function):
+    """Record a span named after `function` around every call while tracing is enabled"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return function(*args, **kwargs)
+        with tracer.span(function.__qualname__):
+            return function(*args, **kwargs)
+    return wrapper
+
+if os.environ.get(TRACE_ENV_VAR):
+    enable_tracing(os.environ[TRACE_ENV_VAR])
+
+atexit.register(tracer.finish)
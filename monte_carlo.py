@@ -0,0 +1,225 @@
+"""Monte Carlo uncertainty bands for fuel, L/100km, cost and CO2.
+
+    python monte_carlo.py --scenario 2 --trials 100000 \
+        --vary mass=normal:1000:50 --vary efficiency=uniform:0.35:0.42 -j 4
+
+Any of UNCERTAIN_INPUTS can be given a distribution; the rest keep their
+default value. The trip itself (scenario, cruise speed, distance) is
+fixed, so its speed and slope profile is computed once. Every term of
+runSimulation's fuel chain is then linear in the trial's inputs except
+aerodynamic drag, whose Cd band depends on the Reynolds number: a step is
+in a band when its speed is above breakpoint * AIR_VISCOSITY /
+(air_density * length). With the trip's speeds sorted and suffix sums of
+speed**3 precomputed, each trial's drag work is three binary searches,
+so a trial costs O(log steps) instead of O(steps) and matches the stepped
+engine except for rounding at band edges.
+
+Trials are drawn in fixed-size batches, each from its own child of one
+SeedSequence, so the result for a given seed is the same whatever the
+number of worker processes.
+"""
+import argparse
+import multiprocessing
+import numpy as np
+import vehicle_engine
+from parameter_sweep import trip_profile
+from run_metrics import CO2_PER_LITER, DEFAULT_FUEL_PRICE
+from vehicle_engine import (
+    AIR_VISCOSITY, CD_REYNOLDS_BREAKPOINTS, CD_VALUES, GRAVITY, calculate_fuel_volume
+)
+
+BATCH_TRIALS = 16384
+DEFAULT_TRIALS = 100000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+UNCERTAIN_INPUTS = {
+    'mass': vehicle_engine.DEFAULT_PARAMETERS['mass'],
+    'width': vehicle_engine.DEFAULT_PARAMETERS['width'],
+    'height': vehicle_engine.DEFAULT_PARAMETERS['height'],
+    'length': vehicle_engine.DEFAULT_PARAMETERS['length'],
+    'efficiency': vehicle_engine.DEFAULT_PARAMETERS['efficiency'],
+    'air_density': vehicle_engine.AIR_DENSITY,
+    'rolling_coefficient': vehicle_engine.ROLLING_RESISTANCE_COEFF,
+    'fuel_price': DEFAULT_FUEL_PRICE,
+}
+
+# name -> (number of parameters, sampler(rng, size, *parameters))
+DISTRIBUTIONS = {
+    'fixed': (1, lambda rng, size, value: np.full(size, value)),
+    'normal': (2, lambda rng, size, mean, std: rng.normal(mean, std, size)),
+    'uniform': (2, lambda rng, size, low, high: rng.uniform(low, high, size)),
+    'triangular': (3, lambda rng, size, low, mode, high: rng.triangular(low, mode, high, size)),
+    'lognormal': (2, lambda rng, size, mean, sigma: rng.lognormal(mean, sigma, size)),
+}
+
+METRICS = ('total_fuel', 'fuel_per_100km', 'cost', 'co2')
+
+# Inputs that must be positive; the others must not be negative, and efficiency is at most 1
+POSITIVE_INPUTS = ('mass', 'width', 'height', 'length', 'efficiency', 'air_density')
+# Rounds of redrawing out-of-range samples before a distribution is rejected
+MAX_REDRAWS = 100
+
+def parse_distribution(text):
+    """'name=kind:p1:p2...' -> (name, (kind, p1, p2, ...))"""
+    name, _, spec = text.partition('=')
+    kind, *values = spec.split(':')
+    if name not in UNCERTAIN_INPUTS:
+        raise ValueError(f"Unknown input '{name}'; choose from {', '.join(UNCERTAIN_INPUTS)}")
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{kind}'; choose from {', '.join(DISTRIBUTIONS)}")
+    if len(values) != DISTRIBUTIONS[kind][0]:
+        raise ValueError(f"Distribution '{kind}' takes {DISTRIBUTIONS[kind][0]} parameter(s)")
+    spec = (kind,) + tuple(float(value) for value in values)
+    check_distribution(name, spec)
+    return name, spec
+
+def check_distribution(name, spec):
+    """Raise ValueError if `spec` (kind, *parameters) cannot describe input `name`"""
+    kind, *values = spec
+    if kind == 'fixed' and not valid_samples(name, np.array(values)).all():
+        raise ValueError(f"{values[0]:g} is not a valid {name}")
+    if kind in ('normal', 'lognormal') and not values[1] >= 0:
+        raise ValueError(f"The spread of the {kind} distribution of {name} must not be negative")
+    if kind == 'uniform' and not values[0] <= values[1]:
+        raise ValueError(f"The uniform distribution of {name} needs low <= high")
+    if kind == 'triangular' and not (values[0] <= values[1] <= values[2] and values[0] < values[2]):
+        raise ValueError(f"The triangular distribution of {name} needs low <= mode <= high and low < high")
+
+def valid_samples(name, values):
+    """Which samples are physically meaningful values of input `name`"""
+    valid = np.isfinite(values) & (values > 0 if name in POSITIVE_INPUTS else values >= 0)
+    if name == 'efficiency':
+        valid &= values <= 1.0
+    return valid
+
+class TripSums:
+    """Per-trip sums that every trial's fuel is computed from"""
+    def __init__(self, profile, dt=1.0):
+        speed = profile['speed']
+        dx = profile['dx']
+        order = np.argsort(speed, kind='stable')
+        self.sorted_speed = speed[order]
+        # cubed_above[i]: sum of speed**2 * dx over the steps from sorted position i upwards
+        cubed = (speed * speed * dx)[order]
+        self.cubed_above = np.append(np.cumsum(cubed[::-1])[::-1], 0.0)
+        self.rolling = float(np.dot(np.cos(profile['slope']), dx))
+        self.climbing = float(np.dot(np.sin(profile['slope']), dx))
+        self.inertial = float(np.dot(profile['positive_acceleration'], dx))
+        self.distance = profile['distance']
+
+    def drag_work(self, air_density, frontal_area, length):
+        """Sum of drag * dx per trial, with Cd per step from its Reynolds band"""
+        weighted = CD_VALUES[0] * self.cubed_above[0]
+        for breakpoint, below, above in zip(CD_REYNOLDS_BREAKPOINTS, CD_VALUES[:-1], CD_VALUES[1:]):
+            threshold = breakpoint * AIR_VISCOSITY / (air_density * length)
+            start = np.searchsorted(self.sorted_speed, threshold, side='left')
+            weighted = weighted + (above - below) * self.cubed_above[start]
+        return 0.5 * air_density * frontal_area * weighted
+
+def sample_inputs(distributions, rng, size):
+    """{input: samples} for every uncertain input, drawn in UNCERTAIN_INPUTS order.
+
+    Samples outside an input's valid range (see valid_samples), such as
+    the negative tail of a normal mass, are redrawn, so each distribution
+    is truncated to that range rather than giving negative or infinite fuel.
+    """
+    samples = {}
+    for name, default in UNCERTAIN_INPUTS.items():
+        kind, *values = distributions.get(name, ('fixed', default))
+        sampler = DISTRIBUTIONS[kind][1]
+        drawn = sampler(rng, size, *values)
+        for _ in range(MAX_REDRAWS):
+            invalid = np.flatnonzero(~valid_samples(name, drawn))
+            if not len(invalid):
+                break
+            drawn[invalid] = sampler(rng, len(invalid), *values)
+        else:
+            raise ValueError(f"The {kind} distribution of {name} rarely gives a valid {name}")
+        samples[name] = drawn
+    return samples
+
+def evaluate_trials(sums, inputs):
+    """{metric: per-trial values} for a batch of sampled inputs"""
+    mass = inputs['mass']
+    work = (
+        sums.drag_work(inputs['air_density'], inputs['width'] * inputs['height'], inputs['length'])
+        + inputs['rolling_coefficient'] * mass * GRAVITY * sums.rolling
+        + mass * GRAVITY * sums.climbing
+        + mass * sums.inertial
+    )
+    total_fuel = calculate_fuel_volume(work, inputs['efficiency'])
+    return {
+        'total_fuel': total_fuel,
+        'fuel_per_100km': total_fuel / sums.distance * 100000.0 if sums.distance > 0 else np.zeros(len(mass)),
+        'cost': total_fuel * inputs['fuel_price'],
+        'co2': total_fuel * CO2_PER_LITER,
+    }
+
+def run_batch(job):
+    sums, distributions, seed, size = job
+    rng = np.random.default_rng(seed)
+    return evaluate_trials(sums, sample_inputs(distributions, rng, size))
+
+def run_monte_carlo(distributions, scenario, params=None, trials=DEFAULT_TRIALS, seed=0,
+                    workers=1, percentiles=DEFAULT_PERCENTILES):
+    """Sample `trials` input sets and summarize the spread of every metric.
+
+    `distributions` maps names in UNCERTAIN_INPUTS to (kind, *parameters)
+    with kind from DISTRIBUTIONS. Returns {metric: {'mean', 'std',
+    'p<q>' for every percentile q}} plus 'samples': {metric: array}.
+    """
+    for name, spec in distributions.items():
+        check_distribution(name, spec)
+    params = dict(vehicle_engine.DEFAULT_PARAMETERS, **(params or {}))
+    sums = TripSums(trip_profile(scenario, params['distance'], params['speed']))
+    sizes = [min(BATCH_TRIALS, trials - start) for start in range(0, trials, BATCH_TRIALS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(sums, distributions, child, size) for child, size in zip(seeds, sizes)]
+
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+            batches = pool.map(run_batch, jobs)
+    else:
+        batches = [run_batch(job) for job in jobs]
+
+    samples = dict((metric, np.concatenate([batch[metric] for batch in batches])) for metric in METRICS)
+    summary = {'samples': samples}
+    for metric, values in samples.items():
+        bands = dict(zip((f"p{q:g}" for q in percentiles), np.percentile(values, percentiles)))
+        summary[metric] = dict(mean=values.mean(), std=values.std(ddof=1) if len(values) > 1 else 0.0, **bands)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentile bands of fuel, cost and CO2 under uncertain inputs")
+    parser.add_argument("--scenario", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['speed'], help="cruise speed (km/h)")
+    parser.add_argument("--distance", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['distance'], help="trip distance (km)")
+    parser.add_argument(
+        "--vary", action="append", default=[], metavar="NAME=KIND:P1[:P2...]",
+        help=f"distribution of one input ({', '.join(UNCERTAIN_INPUTS)}); kinds: {', '.join(DISTRIBUTIONS)}"
+    )
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes (0 = one per CPU core)"
+    )
+    args = parser.parse_args()
+
+    try:
+        distributions = dict(parse_distribution(text) for text in args.vary)
+    except ValueError as e:
+        parser.error(str(e))
+    summary = run_monte_carlo(
+        distributions, args.scenario, dict(speed=args.speed, distance=args.distance),
+        trials=args.trials, seed=args.seed, workers=args.jobs or multiprocessing.cpu_count()
+    )
+
+    bands = [key for key in summary['total_fuel'] if key.startswith('p')]
+    print(f"{'Metric':16s} {'Mean':>10s} {'Std':>10s} " + " ".join(f"{band:>10s}" for band in bands))
+    for metric in METRICS:
+        row = summary[metric]
+        print(f"{metric:16s} {row['mean']:10.4f} {row['std']:10.4f} " + " ".join(f"{row[band]:10.4f}" for band in bands))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Fuel-minimal cruise speed and vehicle parameters on a given scenario.
+
+    python optimizer.py --scenario 2 --optimize speed=40:160
+    python optimizer.py --scenario 2 --optimize frontal_area=1:4 --target 12.0
+    python optimizer.py --scenario 1 --optimize speed=40:160 mass=800:1500 frontal_area=2:4
+
+Candidates are evaluated in batches with the same closed-form fuel chain
+as the Monte Carlo engine (monte_carlo.TripSums): the trip profile of
+each distinct cruise speed is built once, after which a candidate vehicle
+costs a few binary searches. Every evaluated point is memoized, so the
+refinement steps of a search never pay twice for the same candidate.
+
+One parameter is searched by grid refinement (a batch of grid points per
+round, zooming in on the best) or golden-section search; several
+parameters by differential evolution, one batched population per
+generation. With --target the objective becomes the distance of the
+metric from the target, e.g. the frontal area that just reaches a given
+L/100km.
+"""
+import argparse
+import csv
+import math
+from collections import OrderedDict
+import numpy as np
+import vehicle_engine
+from monte_carlo import UNCERTAIN_INPUTS, TripSums, evaluate_trials
+from parameter_sweep import trip_profile
+
+OPTIMIZABLE = ('speed', 'mass', 'width', 'height', 'frontal_area', 'length', 'efficiency')
+METRICS = ('fuel_per_100km', 'total_fuel', 'cost', 'co2')
+
+GRID_POINTS = 33
+GRID_ROUNDS = 12
+POPULATION = 32
+GENERATIONS = 100
+DIFFERENTIAL_WEIGHT = 0.7
+CROSSOVER_RATE = 0.9
+RELATIVE_TOLERANCE = 1e-6
+
+# Trip profiles kept per objective; a search over cruise speed visits many
+TRIP_CACHE_SIZE = 64
+
+class FuelObjective:
+    """Batched, memoized objective over a fixed scenario.
+
+    Called with an (N, len(names)) array of candidates, returns N
+    objective values. `trace` lists (point, value, metrics) for every
+    distinct candidate in evaluation order.
+    """
+    def __init__(self, scenario, names, params=None, metric='fuel_per_100km', target=None):
+        unknown = [name for name in names if name not in OPTIMIZABLE]
+        if unknown:
+            raise ValueError(f"Cannot optimize {', '.join(unknown)}; choose from {', '.join(OPTIMIZABLE)}")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'; choose from {', '.join(METRICS)}")
+        if 'frontal_area' in names and ('width' in names or 'height' in names):
+            raise ValueError("frontal_area replaces width * height; optimize either frontal_area or width and height")
+        self.scenario = scenario
+        self.names = list(names)
+        self.params = dict(vehicle_engine.DEFAULT_PARAMETERS, **(params or {}))
+        self.metric = metric
+        self.target = target
+        self.memo = {}
+        self.trip_sums = OrderedDict()
+        self.trace = []
+        self.hits = 0
+
+    def sums(self, speed):
+        sums = self.trip_sums.get(speed)
+        if sums is None:
+            sums = TripSums(trip_profile(self.scenario, self.params['distance'], speed))
+            self.trip_sums[speed] = sums
+            if len(self.trip_sums) > TRIP_CACHE_SIZE:
+                self.trip_sums.popitem(last=False)
+        else:
+            self.trip_sums.move_to_end(speed)
+        return sums
+
+    def __call__(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        keys = [tuple(row) for row in points.tolist()]
+        new = list(dict.fromkeys(key for key in keys if key not in self.memo))
+        self.hits += len(keys) - len(new)
+        if new:
+            self.evaluate(np.array(new))
+        return np.array([self.memo[key][0] for key in keys])
+
+    def evaluate(self, points):
+        column = dict(zip(self.names, points.T))
+        inputs = dict((name, np.full(len(points), float(value))) for name, value in UNCERTAIN_INPUTS.items())
+        for name in ('mass', 'width', 'height', 'length', 'efficiency'):
+            inputs[name] = column.get(name, np.full(len(points), float(self.params[name])))
+        if 'frontal_area' in column:
+            # Only the product width * height enters the physics
+            inputs['width'] = column['frontal_area']
+            inputs['height'] = np.ones(len(points))
+        speeds = column.get('speed', np.full(len(points), float(self.params['speed'])))
+
+        metrics = dict((name, np.empty(len(points))) for name in METRICS)
+        for speed in np.unique(speeds):
+            rows = speeds == speed
+            batch = evaluate_trials(self.sums(float(speed)), dict((name, values[rows]) for name, values in inputs.items()))
+            for name in METRICS:
+                metrics[name][rows] = batch[name]
+
+        values = metrics[self.metric]
+        if self.target is not None:
+            values = np.abs(values - self.target)
+        for i, point in enumerate(points.tolist()):
+            row = dict((name, float(metrics[name][i])) for name in METRICS)
+            self.memo[tuple(point)] = (float(values[i]), row)
+            self.trace.append((dict(zip(self.names, point)), float(values[i]), row))
+
+def grid_refinement(objective, low, high, points=GRID_POINTS, rounds=GRID_ROUNDS, tol=RELATIVE_TOLERANCE):
+    """Minimize a one-parameter objective by evaluating a grid and zooming in on its best point"""
+    lowest, highest = low, high
+    best = None
+    for _ in range(rounds):
+        grid = np.linspace(low, high, points)
+        values = objective(grid[:, None])
+        best = grid[int(np.argmin(values))]
+        step = (high - low) / (points - 1)
+        low, high = max(lowest, best - step), min(highest, best + step)
+        if high - low <= tol * max(abs(best), 1.0):
+            break
+    return np.array([best])
+
+def golden_section(objective, low, high, tol=RELATIVE_TOLERANCE, max_iterations=200):
+    """Minimize a unimodal one-parameter objective by golden-section search"""
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = low, high
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = objective([[c], [d]])
+    for _ in range(max_iterations):
+        if b - a <= tol * max(abs(a) + abs(b), 1.0):
+            break
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = objective([[c]])[0]
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = objective([[d]])[0]
+    return np.array([c if fc < fd else d])
+
+def differential_evolution(objective, low, high, population=POPULATION, generations=GENERATIONS,
+                           weight=DIFFERENTIAL_WEIGHT, crossover=CROSSOVER_RATE, seed=0,
+                           tol=RELATIVE_TOLERANCE):
+    """Minimize over a box with DE/rand/1/bin, evaluating each generation as one batch"""
+    rng = np.random.default_rng(seed)
+    dimensions = len(low)
+    members = rng.uniform(low, high, (population, dimensions))
+    values = objective(members)
+    for _ in range(generations):
+        # Three distinct partners per member, none equal to the member itself
+        partners = np.argsort(rng.random((population, population - 1)), axis=1)[:, :3]
+        partners += partners >= np.arange(population)[:, None]
+        a, b, c = (members[partners[:, i]] for i in range(3))
+        mutant = np.clip(a + weight * (b - c), low, high)
+        cross = rng.random((population, dimensions)) < crossover
+        cross[np.arange(population), rng.integers(dimensions, size=population)] = True
+        candidates = np.where(cross, mutant, members)
+        candidate_values = objective(candidates)
+        better = candidate_values <= values
+        members[better] = candidates[better]
+        values[better] = candidate_values[better]
+        if values.max() - values.min() <= tol * max(abs(values.min()), 1e-12):
+            break
+    return members[int(np.argmin(values))]
+
+def optimize(scenario, bounds, params=None, metric='fuel_per_100km', target=None, method=None, seed=0):
+    """Find the parameter values that minimize `metric` (or its distance from `target`).
+
+    `bounds` maps names in OPTIMIZABLE to (low, high); other parameters
+    keep their value in `params` (default vehicle_engine.DEFAULT_PARAMETERS).
+    `method` is 'grid' or 'golden' for one parameter and 'evolution' for
+    any number (the default for more than one). Returns a dict with the
+    best point, its objective value and metrics, the evaluation trace
+    and the number of distinct evaluations and memo hits.
+    """
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in names], dtype=np.float64)
+    objective = FuelObjective(scenario, names, params, metric, target)
+
+    method = method or ('grid' if len(names) == 1 else 'evolution')
+    if method in ('grid', 'golden') and len(names) != 1:
+        raise ValueError(f"Method '{method}' searches exactly one parameter")
+    if method == 'grid':
+        best = grid_refinement(objective, low[0], high[0])
+    elif method == 'golden':
+        best = golden_section(objective, low[0], high[0])
+    elif method == 'evolution':
+        best = differential_evolution(objective, low, high, seed=seed)
+    else:
+        raise ValueError(f"Unknown optimization method: {method}")
+
+    value = objective(best[None])[0]
+    return {
+        'best': dict(zip(names, best.tolist())),
+        'value': value,
+        'metrics': objective.memo[tuple(best.tolist())][1],
+        'method': method,
+        'trace': objective.trace,
+        'evaluations': len(objective.trace),
+        'memo_hits': objective.hits,
+    }
+
+def save_trace_csv(result, filename):
+    names = list(result['best'])
+    with open(filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(names + ['objective'] + list(METRICS))
+        for point, value, metrics in result['trace']:
+            writer.writerow([f"{point[name]:.6g}" for name in names] + [f"{value:.6g}"]
+                            + [f"{metrics[name]:.6g}" for name in METRICS])
+
+def parse_bounds(text):
+    """'name=low:high' -> (name, (low, high))"""
+    name, _, spec = text.partition('=')
+    low, high = (float(value) for value in spec.split(':'))
+    if low >= high:
+        raise ValueError(f"Empty range for {name}")
+    return name, (low, high)
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize cruise speed and vehicle parameters for fuel use")
+    parser.add_argument("--scenario", type=int, default=1)
+    parser.add_argument(
+        "--optimize", nargs='+', required=True, metavar="NAME=LOW:HIGH",
+        help=f"parameters to search and their ranges ({', '.join(OPTIMIZABLE)})"
+    )
+    parser.add_argument("--metric", choices=METRICS, default='fuel_per_100km')
+    parser.add_argument("--target", type=float, help="find the value where the metric equals this instead of its minimum")
+    parser.add_argument("--method", choices=('grid', 'golden', 'evolution'))
+    parser.add_argument("--speed", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['speed'], help="cruise speed (km/h)")
+    parser.add_argument("--distance", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['distance'], help="trip distance (km)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the evaluation trace to this CSV file")
+    args = parser.parse_args()
+
+    try:
+        bounds = dict(parse_bounds(text) for text in args.optimize)
+        result = optimize(
+            args.scenario, bounds, dict(speed=args.speed, distance=args.distance),
+            args.metric, args.target, args.method, args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Best ({result['method']}, {result['evaluations']} evaluations, {result['memo_hits']} memo hits):")
+    for name, value in result['best'].items():
+        print(f"  {name}: {value:.4f}")
+    for name, value in result['metrics'].items():
+        print(f"  {name}: {value:.4f}")
+    if args.output:
+        save_trace_csv(result, args.output)
+        print(f"Evaluation trace saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
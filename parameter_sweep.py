@@ -0,0 +1,141 @@
+"""Batched parameter sweeps over the runSimulation physics.
+
+Every combination of the given parameter values is simulated. Runs that
+share a scenario, cruise speed and distance share the same speed and
+slope profile, so each such group is evaluated as one 2-D
+(configuration x timestep) block, split into row chunks so that no
+intermediate array holds more than `max_chunk_elements` values.
+"""
+import argparse
+import itertools
+import numpy as np
+from vehicle_engine import (
+    calculate_aerodynamic_drag, calculate_cd_from_reynolds, calculate_fuel_volume,
+    calculate_reynolds, calculate_rolling_resistance, calculate_slope_resistance,
+    speed_and_slope, trip_steps
+)
+
+MAX_CHUNK_ELEMENTS = 4_000_000
+
+SWEEP_FIELDS = [
+    ('scenario', np.int64),
+    ('speed_kmh', np.float64),
+    ('distance_km', np.float64),
+    ('mass', np.float64),
+    ('frontal_area', np.float64),
+    ('length', np.float64),
+    ('efficiency', np.float64),
+    ('total_fuel', np.float64),
+    ('fuel_per_100km', np.float64),
+    ('distance', np.float64),
+    ('max_drag', np.float64),
+    ('altitude_change', np.float64),
+]
+
+def trip_profile(scenario, distance_km, speed_kmh, dt=1.0):
+    """Per-step quantities that do not depend on the vehicle"""
+    base_speed = speed_kmh * 1000.0 / 3600.0
+    steps, total_time = trip_steps(scenario, distance_km, speed_kmh, dt)
+    step = np.arange(steps)
+    speed, slope = speed_and_slope(scenario, step, steps, total_time, base_speed, dt)
+    time = step * dt
+    previous_speed = np.concatenate(([base_speed], speed[:-1]))
+    acceleration = (speed - previous_speed) / dt
+    dx = speed * dt
+    altitude = np.cumsum(dx * np.sin(slope))
+    return {
+        'speed': speed,
+        'slope': slope,
+        'positive_acceleration': np.maximum(acceleration, 0.0),
+        'dx': dx,
+        'distance': float(np.dot(speed[1:], np.diff(time))) if steps > 1 else 0.0,
+        'altitude_change': float(altitude.max() - altitude.min()) if steps else 0.0,
+    }
+
+def evaluate_vehicle_block(profile, mass, frontal_area, length, efficiency):
+    """Total fuel and peak drag for a block of vehicles on one trip profile"""
+    mass = mass[:, None]
+    speed = profile['speed']
+    reynolds = calculate_reynolds(speed, length[:, None])
+    drag = calculate_aerodynamic_drag(calculate_cd_from_reynolds(reynolds), frontal_area[:, None], speed)
+    force = (
+        drag
+        + calculate_rolling_resistance(mass, profile['slope'])
+        + calculate_slope_resistance(mass, profile['slope'])
+        + mass * profile['positive_acceleration']
+    )
+    fuel = calculate_fuel_volume(force * profile['dx'], efficiency[:, None])
+    return fuel.sum(axis=1), drag.max(axis=1)
+
+def run_parameter_sweep(mass, frontal_area, efficiency, speed_kmh, scenario,
+                        length=5.0, distance_km=100.0,
+                        max_chunk_elements=MAX_CHUNK_ELEMENTS):
+    """Simulate every combination of the given values.
+
+    Each argument may be a scalar or a sequence. Returns a structured array
+    with one row per configuration (fields in SWEEP_FIELDS), ordered as
+    itertools.product(scenario, speed_kmh, distance_km, mass, frontal_area,
+    length, efficiency).
+    """
+    scenarios = np.atleast_1d(scenario).astype(np.int64)
+    speeds = np.atleast_1d(speed_kmh).astype(np.float64)
+    distances = np.atleast_1d(distance_km).astype(np.float64)
+    vehicles = np.array(list(itertools.product(
+        np.atleast_1d(mass), np.atleast_1d(frontal_area),
+        np.atleast_1d(length), np.atleast_1d(efficiency)
+    )), dtype=np.float64).reshape(-1, 4)
+
+    trips = list(itertools.product(scenarios, speeds, distances))
+    table = np.zeros(len(trips) * len(vehicles), dtype=SWEEP_FIELDS)
+
+    for index, (trip_scenario, trip_speed, trip_distance) in enumerate(trips):
+        rows = table[index * len(vehicles):(index + 1) * len(vehicles)]
+        rows['scenario'] = trip_scenario
+        rows['speed_kmh'] = trip_speed
+        rows['distance_km'] = trip_distance
+        rows['mass'], rows['frontal_area'], rows['length'], rows['efficiency'] = vehicles.T
+
+        profile = trip_profile(trip_scenario, trip_distance, trip_speed)
+        rows['distance'] = profile['distance']
+        rows['altitude_change'] = profile['altitude_change']
+
+        steps = len(profile['speed'])
+        if steps == 0:
+            continue
+        chunk = max(1, max_chunk_elements // steps)
+        for start in range(0, len(vehicles), chunk):
+            block = vehicles[start:start + chunk]
+            total_fuel, max_drag = evaluate_vehicle_block(profile, *block.T)
+            rows['total_fuel'][start:start + chunk] = total_fuel
+            rows['max_drag'][start:start + chunk] = max_drag
+
+    moving = table['distance'] > 0
+    table['fuel_per_100km'][moving] = table['total_fuel'][moving] / table['distance'][moving] * 100000.0
+    return table
+
+def save_sweep_csv(table, filename):
+    names = table.dtype.names
+    formats = ['%d' if table.dtype[name].kind == 'i' else '%.6g' for name in names]
+    np.savetxt(filename, table, fmt=formats, delimiter=',', header=','.join(names), comments='')
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a grid of vehicle configurations in one batch")
+    parser.add_argument("--mass", type=float, nargs='+', default=[1000.0])
+    parser.add_argument("--frontal-area", type=float, nargs='+', default=[4.0])
+    parser.add_argument("--length", type=float, nargs='+', default=[5.0])
+    parser.add_argument("--efficiency", type=float, nargs='+', default=[0.4])
+    parser.add_argument("--speed", type=float, nargs='+', default=[90.0], help="cruise speed (km/h)")
+    parser.add_argument("--distance", type=float, nargs='+', default=[100.0], help="trip distance (km)")
+    parser.add_argument("--scenario", type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument("-o", "--output", default="parameter_sweep.csv")
+    args = parser.parse_args()
+
+    table = run_parameter_sweep(
+        args.mass, args.frontal_area, args.efficiency, args.speed, args.scenario,
+        length=args.length, distance_km=args.distance
+    )
+    save_sweep_csv(table, args.output)
+    print(f"Evaluated {len(table)} configurations, summary saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
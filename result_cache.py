@@ -0,0 +1,103 @@
+"""Persistent cache of complete simulation runs, addressed by their inputs.
+
+A run is stored under the SHA-256 of its parameter set, scenario (or the
+content digest of its route) and vehicle_engine.ENGINE_VERSION, so
+identical inputs are never simulated twice and runs with different
+inputs never overwrite each other. Entries
+are .npy column tables; a hit refreshes the file's mtime and the oldest
+entries are deleted once the directory grows past the size limit.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import vehicle_engine
+from cache_paths import DEFAULT_CACHE_DIR
+from route_profiles import Route
+from simulation_data import SimulationData
+
+DEFAULT_SIZE_LIMIT = 1024 * 1024 * 1024
+
+PARAMETER_KEYS = ('mass', 'width', 'height', 'length', 'efficiency', 'distance', 'speed')
+
+def result_key(params, scenario):
+    key = dict((name, float(params[name])) for name in PARAMETER_KEYS)
+    key['scenario'] = scenario.digest if isinstance(scenario, Route) else int(scenario)
+    key['engine'] = vehicle_engine.ENGINE_VERSION
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, size_limit=DEFAULT_SIZE_LIMIT):
+        self.directory = directory
+        self.size_limit = size_limit
+
+    def path(self, params, scenario):
+        return os.path.join(self.directory, result_key(params, scenario) + ".npy")
+
+    def get(self, params, scenario):
+        """Stored result for these inputs, or None"""
+        path = self.path(params, scenario)
+        try:
+            table = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return SimulationData(table)
+
+    def put(self, params, scenario, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(params, scenario)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            np.save(file, data.table, allow_pickle=False)
+        os.replace(temporary, path)
+        self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every stored run, oldest first"""
+        entries = []
+        try:
+            scan = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for entry in scan:
+            if not entry.name.endswith(".npy"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Delete least recently used runs until the cache fits its size limit"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.size_limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+result_cache = ResultCache()
+
+def cached_simulate(params, scenario, cache=None):
+    """vehicle_engine.simulate, reusing a stored result when one exists"""
+    cache = cache or result_cache
+    data = cache.get(params, scenario)
+    if data is None:
+        data = vehicle_engine.simulate(params, scenario)
+        cache.put(params, scenario, data)
+    return data
@@ -0,0 +1,208 @@
+"""Drive cycles and terrain profiles loaded from files.
+
+A route file is a CSV table indexed by `time` (s) or `distance` (m) with
+any of these columns:
+
+    speed       speed in m/s
+    speed_kmh   speed in km/h
+    elevation   height above any datum in m
+    slope       road angle in radians
+
+Standard test cycles and logged trips are time-indexed speed tables,
+optionally with elevation; elevation profiles are distance-indexed. A
+route with a speed column is a drive cycle and sets the trip duration; a
+route without one is terrain only and is driven at the cruise speed of
+the trip.
+
+Every route is converted once into a time-indexed speed table with its
+cumulative distance and a distance-indexed piecewise-constant slope
+table. The converted arrays are kept in memory for the process and as
+.npz files in ROUTE_CACHE_DIR (under the result cache directory), keyed
+on the source file's path, mtime and size, so later runs skip the CSV
+parse. Lookups are binary searches (np.interp / np.searchsorted), so
+evaluating a whole run against a 100k-point profile costs
+O(steps * log(points)).
+"""
+import glob
+import hashlib
+import os
+import threading
+import warnings
+import numpy as np
+from cache_paths import DEFAULT_CACHE_DIR
+
+ROUTE_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "routes")
+DEFAULT_ROUTES_DIR = "routes"
+
+# Bump whenever the conversion changes so cached routes are rebuilt
+ROUTE_FORMAT_VERSION = 1
+
+INDEX_COLUMNS = ('time', 'distance')
+VALUE_COLUMNS = ('speed', 'speed_kmh', 'elevation', 'slope')
+ROUTE_ARRAYS = ('cycle_time', 'cycle_speed', 'cycle_distance', 'terrain_distance', 'terrain_slope')
+
+class Route:
+    """A drive cycle and/or terrain profile in interpolation-ready form.
+
+    cycle_time, cycle_speed and cycle_distance hold the speed and the
+    cumulative distance at each time point of the cycle (empty for a
+    terrain-only route). terrain_slope[i] is the slope from
+    terrain_distance[i] to terrain_distance[i + 1]; the last slope holds
+    to the end of the trip.
+    """
+    def __init__(self, name, cycle_time, cycle_speed, cycle_distance, terrain_distance, terrain_slope):
+        self.name = name
+        self.cycle_time = cycle_time
+        self.cycle_speed = cycle_speed
+        self.cycle_distance = cycle_distance
+        self.terrain_distance = terrain_distance
+        self.terrain_slope = terrain_slope
+        digest = hashlib.sha256()
+        for array in self.arrays():
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+            digest.update(b"|")
+        self.digest = digest.hexdigest()
+
+    def arrays(self):
+        return [getattr(self, name) for name in ROUTE_ARRAYS]
+
+    @property
+    def has_cycle(self):
+        return len(self.cycle_time) > 0
+
+    @property
+    def duration(self):
+        return float(self.cycle_time[-1]) if self.has_cycle else 0.0
+
+    def speed(self, time, base_speed):
+        """Speed (m/s) at each time; the cruise speed for a terrain-only route"""
+        time = np.asarray(time, dtype=np.float64)
+        if not self.has_cycle:
+            return np.full(time.shape, float(base_speed))
+        return np.interp(time, self.cycle_time, self.cycle_speed)
+
+    def distance(self, time, base_speed):
+        """Distance (m) covered by each time"""
+        time = np.asarray(time, dtype=np.float64)
+        if not self.has_cycle:
+            return time * base_speed
+        return np.interp(time, self.cycle_time, self.cycle_distance)
+
+    def slope(self, time, base_speed):
+        """Road angle (rad) at each time, looked up by the distance covered"""
+        time = np.asarray(time, dtype=np.float64)
+        if len(self.terrain_distance) == 0:
+            return np.zeros(time.shape)
+        index = np.searchsorted(self.terrain_distance, self.distance(time, base_speed), side='right') - 1
+        return self.terrain_slope[np.clip(index, 0, len(self.terrain_slope) - 1)]
+
+def read_route_table(path):
+    """{column: float64 array} of a route CSV, with the index column first"""
+    with open(path, "r") as file:
+        header = [name.strip() for name in file.readline().strip().split(',')]
+        index = [name for name in header if name in INDEX_COLUMNS]
+        if len(index) != 1:
+            raise ValueError(f"Route needs exactly one of the columns {', '.join(INDEX_COLUMNS)}")
+        values = [name for name in header if name in VALUE_COLUMNS]
+        if not values:
+            raise ValueError(f"Route needs at least one of the columns {', '.join(VALUE_COLUMNS)}")
+        names = index + values
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            rows = np.loadtxt(
+                file, delimiter=',', usecols=[header.index(name) for name in names],
+                dtype=np.float64, ndmin=2
+            )
+    if len(rows) < 2:
+        raise ValueError("Route needs at least two rows")
+    table = dict(zip(names, rows.T))
+    if np.any(np.diff(table[index[0]]) <= 0):
+        raise ValueError(f"Route column '{index[0]}' must be strictly increasing")
+    return table
+
+def cumulative_trapezoid(y, x):
+    total = np.zeros(len(x))
+    np.cumsum((y[1:] + y[:-1]) * 0.5 * np.diff(x), out=total[1:])
+    return total
+
+def terrain_from_samples(distance, table):
+    """(terrain_distance, terrain_slope) from the elevation or slope column at the given distances"""
+    if 'elevation' not in table and 'slope' not in table:
+        return np.empty(0), np.empty(0)
+    # Stationary samples share a distance; keep the first of each
+    distance, keep = np.unique(distance, return_index=True)
+    if 'slope' in table:
+        return distance, table['slope'][keep]
+    if len(distance) < 2:
+        return np.empty(0), np.empty(0)
+    slope = np.arctan2(np.diff(table['elevation'][keep]), np.diff(distance))
+    return distance, np.append(slope, slope[-1])
+
+def build_route(name, table):
+    """Convert a table from read_route_table into a Route"""
+    speed = table.get('speed')
+    if speed is None and 'speed_kmh' in table:
+        speed = table['speed_kmh'] * 1000.0 / 3600.0
+    if speed is not None and np.any(speed < 0):
+        raise ValueError("Route speeds must not be negative")
+
+    if 'time' in table:
+        if speed is None:
+            raise ValueError("A time-indexed route needs a speed column")
+        time = table['time'] - table['time'][0]
+        distance = cumulative_trapezoid(speed, time)
+    else:
+        distance = table['distance'] - table['distance'][0]
+        if speed is None:
+            time = np.empty(0)
+        else:
+            if np.any(speed <= 0):
+                raise ValueError("A distance-indexed route needs positive speeds")
+            time = cumulative_trapezoid(1.0 / speed, distance)
+
+    terrain_distance, terrain_slope = terrain_from_samples(distance, table)
+    if speed is None:
+        return Route(name, np.empty(0), np.empty(0), np.empty(0), terrain_distance, terrain_slope)
+    return Route(name, time, speed, distance, terrain_distance, terrain_slope)
+
+def route_cache_path(path, directory=ROUTE_CACHE_DIR):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{ROUTE_FORMAT_VERSION}"
+    return os.path.join(directory, hashlib.sha256(key.encode()).hexdigest() + ".npz")
+
+def route_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+loaded_routes = {}
+loaded_routes_lock = threading.Lock()
+
+def load_route(path, cache_dir=ROUTE_CACHE_DIR):
+    """Route from a route CSV, converted once and then served from memory or the binary cache"""
+    cache_path = route_cache_path(path, cache_dir)
+    with loaded_routes_lock:
+        route = loaded_routes.get(cache_path)
+    if route is not None:
+        return route
+
+    name = route_name(path)
+    try:
+        with np.load(cache_path, allow_pickle=False) as stored:
+            route = Route(name, *(stored[array] for array in ROUTE_ARRAYS))
+    except (OSError, ValueError, KeyError):
+        route = build_route(name, read_route_table(path))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                np.savez(file, **dict(zip(ROUTE_ARRAYS, route.arrays())))
+            os.replace(temporary, cache_path)
+        except OSError:
+            pass  # the cache is an optimization; the route is still usable
+
+    with loaded_routes_lock:
+        loaded_routes[cache_path] = route
+    return route
+
+def find_routes(directory=DEFAULT_ROUTES_DIR):
+    """Paths of the route CSV files in `directory`, sorted by name"""
+    return sorted(glob.glob(os.path.join(directory, "*.csv")))
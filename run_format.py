@@ -0,0 +1,149 @@
+"""Binary run files, read through mmap without any parsing.
+
+Layout (all integers and floats little-endian):
+
+    8 bytes   magic b"VSIMRUN1"
+    4 bytes   header length in bytes (uint32)
+    header    UTF-8 JSON: columns, rows, dtype, data offset, run parameters
+    padding   up to DATA_ALIGNMENT
+    data      one block of `rows` float64 values per column, in COLUMNS order
+
+Because the column blocks are contiguous and in COLUMNS order, the data
+section is exactly a (len(COLUMNS), rows) table. open_run_file maps it
+and wraps it in SimulationData without copying, so reopening a run costs
+a header parse and only the pages of the columns a caller actually reads
+are ever loaded from disk. The full float64 values make a run file
+larger than the 6-significant-digit CSV it was converted from; what it
+saves is the text parsing, not space.
+
+    python run_format.py vehicle_simulation_scenario_*.csv --param mass=1500 --param speed=25
+
+A CSV does not carry the parameters of its run; pass them with --param
+to have them stored in the header.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from simulation_data import (
+    COLUMNS, STREAM_CHUNK_ROWS, SimulationData, csv_stem, iter_csv_chunks, open_csv, parse_csv_columns,
+    read_csv_header
+)
+
+RUN_MAGIC = b"VSIMRUN1"
+RUN_EXTENSION = ".vsr"
+DATA_ALIGNMENT = 64
+DTYPE = '<f8'
+
+def is_run_file(filename):
+    try:
+        with open(filename, "rb") as file:
+            return file.read(len(RUN_MAGIC)) == RUN_MAGIC
+    except (FileNotFoundError, IsADirectoryError):
+        return False
+
+def check_run_source(filename):
+    """Raise ValueError unless `filename` is a binary run file or a runSimulation CSV"""
+    if not is_run_file(filename):
+        with open_csv(filename) as file:
+            read_csv_header(file)
+
+def write_run_file(data, filename, params=None):
+    """Write a SimulationData in the binary run layout; `params` is stored in the header"""
+    rows = data.get_size()
+    header = {'columns': list(COLUMNS), 'rows': rows, 'dtype': DTYPE, 'params': params or {}, 'data_offset': 0}
+    # The data offset is stored in the header itself; leave room for its digits
+    fixed = len(RUN_MAGIC) + 4
+    offset = -(-(fixed + len(json.dumps(header)) + 16) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+    header['data_offset'] = offset
+    encoded = json.dumps(header).encode().ljust(offset - fixed)
+
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(RUN_MAGIC)
+        file.write(struct.pack('<I', len(encoded)))
+        file.write(encoded)
+        file.write(np.ascontiguousarray(data.table, dtype=DTYPE).tobytes())
+    os.replace(temporary, filename)
+
+def read_run_header(file):
+    if file.read(len(RUN_MAGIC)) != RUN_MAGIC:
+        raise ValueError("not a binary run file")
+    (length,) = struct.unpack('<I', file.read(4))
+    header = json.loads(file.read(length).decode())
+    if header.get('columns') != list(COLUMNS) or header.get('dtype') != DTYPE:
+        raise ValueError("unsupported binary run layout")
+    return header
+
+def run_file_header(filename):
+    with open(filename, "rb") as file:
+        return read_run_header(file)
+
+def open_run_file(filename):
+    """SimulationData backed by a read-only memory map of the run file"""
+    with open(filename, "rb") as file:
+        header = read_run_header(file)
+        rows = header['rows']
+        if rows == 0:
+            return SimulationData()
+        size = header['data_offset'] + rows * len(COLUMNS) * 8
+        if os.fstat(file.fileno()).st_size < size:
+            raise ValueError("binary run file is truncated")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    table = np.frombuffer(mapped, dtype=DTYPE, count=rows * len(COLUMNS), offset=header['data_offset'])
+    return SimulationData(table.reshape(len(COLUMNS), rows))
+
+def load_run(filename):
+    """SimulationData from a binary run file (memory-mapped) or a runSimulation CSV, plain or compressed"""
+    if is_run_file(filename):
+        return open_run_file(filename)
+    with open_csv(filename) as file:
+        return SimulationData(parse_csv_columns(file))
+
+def iter_run_chunks(filename, chunk_rows=STREAM_CHUNK_ROWS):
+    """(len(COLUMNS), rows) chunks of a binary run file or a runSimulation CSV, plain or compressed"""
+    if is_run_file(filename):
+        table = open_run_file(filename).table
+        for start in range(0, table.shape[1], chunk_rows):
+            yield table[:, start:start + chunk_rows]
+        return
+    with open_csv(filename) as file:
+        yield from iter_csv_chunks(file, chunk_rows)
+
+def convert_csv_to_run(csv_filename, run_filename=None, params=None):
+    """Convert a runSimulation CSV to the binary layout; returns the new file name"""
+    run_filename = run_filename or csv_stem(csv_filename) + RUN_EXTENSION
+    write_run_file(load_run(csv_filename), run_filename, params)
+    return run_filename
+
+def parse_param(text):
+    """(name, value) from a NAME=VALUE option; numeric values are stored as floats"""
+    name, separator, value = text.partition('=')
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{text}'")
+    try:
+        return name, float(value)
+    except ValueError:
+        return name, value
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert simulation CSV files to the binary run format")
+    parser.add_argument("inputs", nargs='+', help="CSV files to convert")
+    parser.add_argument("-o", "--output", help="output file (only with a single input)")
+    parser.add_argument(
+        "--param", type=parse_param, action='append', default=[], metavar="NAME=VALUE",
+        help="run parameter to store in the header of every output (repeatable)"
+    )
+    args = parser.parse_args()
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output needs exactly one input")
+    params = dict(args.param)
+    for filename in args.inputs:
+        output = convert_csv_to_run(filename, args.output, params)
+        print(f"Converted {filename} -> {output} "
+              f"({os.path.getsize(filename) / 1024:.0f} KB -> {os.path.getsize(output) / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
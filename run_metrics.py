@@ -0,0 +1,237 @@
+"""Calculations on run columns and the built-in derived metrics made from them.
+
+Every SimulationData computes the metrics registered here on first use
+(simulation_data.RunMetrics); simulation_data imports this module, so
+they are available without importing the analysis script. Metrics that
+only some tools need can still be added with simulation_data.derived_metric.
+"""
+import numpy as np
+
+DEFAULT_FUEL_PRICE = 1.5
+CO2_PER_LITER = 2.31
+
+# name -> (function(metrics), names of the columns and metrics it reads), in registration order
+BUILTIN_METRICS = {}
+
+def builtin_metric(name, depends):
+    def register(function):
+        BUILTIN_METRICS[name] = (function, tuple(depends))
+        return function
+    return register
+
+def calculate_basic_statistics(values):
+    if len(values) == 0:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    minimum = values.min()
+    maximum = values.max()
+    stats = {
+        'mean': values.mean(),
+        'median': np.median(values),
+        'std': values.std(ddof=1) if len(values) > 1 else 0,
+        'min': minimum,
+        'max': maximum,
+        'range': maximum - minimum
+    }
+    return stats
+
+def calculate_total_distance(speed, time):
+    if len(time) < 2:
+        return 0.0
+    return float(np.dot(speed[1:], np.diff(time)))
+
+def calculate_average_fuel_consumption(cumulative_fuel, distance):
+    if distance == 0:
+        return 0
+    total_fuel = cumulative_fuel[-1] if len(cumulative_fuel) else 0
+    return (total_fuel / distance) * 100000.0
+
+def calculate_energy_efficiency(cumulative_fuel, distance):
+    FUEL_ENERGY_DENSITY = 32.4
+    if distance == 0 or not len(cumulative_fuel):
+        return 0
+    total_energy = cumulative_fuel[-1] * FUEL_ENERGY_DENSITY
+    return distance / total_energy
+
+def calculate_cost_estimation(cumulative_fuel, fuel_price_per_liter=DEFAULT_FUEL_PRICE):
+    if not len(cumulative_fuel):
+        return 0
+    return cumulative_fuel[-1] * fuel_price_per_liter
+
+def calculate_co2_emissions(cumulative_fuel):
+    if not len(cumulative_fuel):
+        return 0
+    return cumulative_fuel[-1] * CO2_PER_LITER
+
+def prefix_sums(values):
+    prefix = np.zeros(len(values) + 1)
+    np.cumsum(values, out=prefix[1:])
+    return prefix
+
+def rolling_sum(values, window, prefix=None):
+    if window < 1 or window > len(values):
+        return np.empty(0)
+    if prefix is None:
+        prefix = prefix_sums(values)
+    return prefix[window:] - prefix[:-window]
+
+def rolling_mean(values, window, prefix=None):
+    return rolling_sum(values, window, prefix) / window
+
+def rolling_max(values, window):
+    # van Herk / Gil-Werman: running maxima inside fixed blocks of `window`
+    # samples, scanned forwards and backwards, cover any window with two lookups.
+    values = np.asarray(values, dtype=np.float64)
+    size = len(values)
+    if window < 1 or window > size:
+        return np.empty(0)
+    padding = (-size) % window
+    blocks = np.concatenate((values, np.full(padding, -np.inf))).reshape(-1, window)
+    forward = np.maximum.accumulate(blocks, axis=1).ravel()
+    backward = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(backward[:size - window + 1], forward[window - 1:size])
+
+def step_durations(time):
+    if len(time) < 2:
+        return np.ones(len(time))
+    dt = np.diff(time)
+    return np.append(dt, dt[-1])
+
+def window_steps(time, seconds):
+    if len(time) < 2:
+        return 1
+    return max(1, int(round(seconds / np.median(np.diff(time)))))
+
+def calculate_rolling_windows(values, windows, time=None, seconds=False, statistics=('sum', 'mean', 'max')):
+    """Windowed sum/mean/max of one column for several window sizes.
+
+    Windows are counted in samples, or in seconds when `seconds` is set
+    (converted with the median time step). All sizes share one prefix sum,
+    so the cost is linear in the run length for each window size; only
+    the requested `statistics` are computed.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    prefix = prefix_sums(values)
+    results = {}
+    for window in windows:
+        steps = window_steps(time, window) if seconds else window
+        result = {'steps': steps}
+        if 'sum' in statistics or 'mean' in statistics:
+            sums = rolling_sum(values, steps, prefix)
+            if 'sum' in statistics:
+                result['sum'] = sums
+            if 'mean' in statistics:
+                result['mean'] = sums / steps
+        if 'max' in statistics:
+            result['max'] = rolling_max(values, steps)
+        results[window] = result
+    return results
+
+def calculate_rolling_fuel_consumption(fuel, speed, time, window=100):
+    window_fuel = calculate_rolling_windows(fuel, [window], statistics=('sum',))[window]['sum'][:len(fuel) - window]
+    window_distance = calculate_rolling_windows(
+        speed * step_durations(time), [window], statistics=('sum',)
+    )[window]['sum'][:len(fuel) - window]
+    fuel_per_100km = np.zeros(len(window_fuel))
+    moving = window_distance > 0
+    fuel_per_100km[moving] = window_fuel[moving] / window_distance[moving] * 100000.0
+    return time[:len(fuel_per_100km)], fuel_per_100km
+
+def find_peak_consumption_period(fuel, time, window_size=100, window_seconds=None):
+    seconds = window_seconds is not None
+    length = window_seconds if seconds else window_size
+    window = calculate_rolling_windows(fuel, [length], time, seconds, statistics=('sum',))[length]
+    window_size = window['steps']
+    if len(fuel) <= window_size:
+        return None
+    
+    sums = window['sum'][:len(fuel) - window_size]
+    max_index = int(np.argmax(sums))
+    max_consumption = sums[max_index]
+    if max_consumption <= 0:
+        max_index = 0
+        max_consumption = 0
+    
+    return {
+        'start_time': time[max_index],
+        'end_time': time[max_index + window_size],
+        'consumption': max_consumption
+    }
+
+def calculate_acceleration_metrics(acceleration):
+    positive_acc = acceleration[acceleration > 0]
+    negative_acc = acceleration[acceleration < 0]
+    
+    return {
+        'avg_acceleration': positive_acc.mean() if len(positive_acc) else 0,
+        'avg_deceleration': negative_acc.mean() if len(negative_acc) else 0,
+        'max_acceleration': acceleration.max() if len(acceleration) else 0,
+        'max_deceleration': acceleration.min() if len(acceleration) else 0
+    }
+
+def calculate_resistance_breakdown(drag, rolling, slope):
+    return resistance_breakdown_from_totals(drag.sum(), rolling.sum(), np.abs(slope).sum())
+
+def resistance_breakdown_from_totals(total_drag, total_rolling, total_slope):
+    total = total_drag + total_rolling + total_slope
+    
+    if total == 0:
+        return None
+    
+    return {
+        'drag_percentage': (total_drag / total) * 100,
+        'rolling_percentage': (total_rolling / total) * 100,
+        'slope_percentage': (total_slope / total) * 100
+    }
+
+@builtin_metric('cumulative_distance', depends=('speed', 'time'))
+def metric_cumulative_distance(metrics):
+    """Distance (m) covered by each row, integrated like calculate_total_distance"""
+    data = metrics.data
+    distance = np.zeros(data.get_size())
+    if len(distance) > 1:
+        np.cumsum(data.speed[1:] * np.diff(data.time), out=distance[1:])
+    return distance
+
+@builtin_metric('distance', depends=('cumulative_distance',))
+def metric_distance(metrics):
+    """Total distance (m), the same integral as calculate_total_distance"""
+    cumulative = metrics['cumulative_distance']
+    return float(cumulative[-1]) if len(cumulative) else 0.0
+
+@builtin_metric('speed_stats', depends=('speed',))
+def metric_speed_stats(metrics):
+    return calculate_basic_statistics(metrics.data.speed)
+
+@builtin_metric('drag_stats', depends=('drag',))
+def metric_drag_stats(metrics):
+    return calculate_basic_statistics(metrics.data.drag)
+
+@builtin_metric('reynolds_stats', depends=('reynolds',))
+def metric_reynolds_stats(metrics):
+    return calculate_basic_statistics(metrics.data.reynolds)
+
+@builtin_metric('altitude_stats', depends=('altitude',))
+def metric_altitude_stats(metrics):
+    return calculate_basic_statistics(metrics.data.altitude)
+
+@builtin_metric('acc_metrics', depends=('acceleration',))
+def metric_acc_metrics(metrics):
+    return calculate_acceleration_metrics(metrics.data.acceleration)
+
+@builtin_metric('resistance_breakdown', depends=('drag', 'rolling_resistance', 'slope_resistance'))
+def metric_resistance_breakdown(metrics):
+    data = metrics.data
+    return calculate_resistance_breakdown(data.drag, data.rolling_resistance, data.slope_resistance)
+
+@builtin_metric('peak_period', depends=('fuel', 'time'))
+def metric_peak_period(metrics):
+    return find_peak_consumption_period(metrics.data.fuel, metrics.data.time)
+
+@builtin_metric('rolling_fuel_consumption', depends=('fuel', 'speed', 'time'))
+def metric_rolling_fuel_consumption(metrics):
+    return calculate_rolling_fuel_consumption(metrics.data.fuel, metrics.data.speed, metrics.data.time)
+
+@builtin_metric('fuel_consumption', depends=('cumulative_fuel', 'distance'))
+def metric_fuel_consumption(metrics):
+    return calculate_average_fuel_consumption(metrics.data.cumulative_fuel, metrics['distance'])
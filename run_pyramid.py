@@ -0,0 +1,164 @@
+"""Multi-resolution min/max/mean summaries of a run, for zooming and panning.
+
+Level k of a column summarizes buckets of BASE_BUCKET * 2**k consecutive
+rows by their min, max and mean, up to the first level with at most
+TOP_BUCKETS buckets. A view of any x-range reads a single level, the
+finest one whose buckets in the range fit the pixel budget, so it costs
+O(budget) whatever the length of the run or of the range. Ranges with at
+most BASE_BUCKET rows per point are decimated from the raw samples.
+
+A pyramid is built once per run and stored beside it as
+<run>.pyramid.npz, keyed on the run file's mtime and size. Columns are
+read from the stored file the first time they are viewed.
+"""
+import os
+import threading
+import numpy as np
+from downsampling import minmax_downsample
+from simulation_data import COLUMNS, csv_stem
+
+BASE_BUCKET = 64
+TOP_BUCKETS = 256
+PYRAMID_SUFFIX = ".pyramid.npz"
+
+# Bump whenever the stored layout changes so old pyramids are rebuilt
+PYRAMID_FORMAT_VERSION = 1
+
+def summarize_buckets(low, high, total, group):
+    """Merge every `group` consecutive buckets (the last may be partial)"""
+    buckets = -(-len(low) // group)
+    padding = buckets * group - len(low)
+    low = np.concatenate((low, np.full(padding, np.inf))).reshape(buckets, group).min(axis=1)
+    high = np.concatenate((high, np.full(padding, -np.inf))).reshape(buckets, group).max(axis=1)
+    total = np.concatenate((total, np.zeros(padding))).reshape(buckets, group).sum(axis=1)
+    return low, high, total
+
+def build_levels(values):
+    """[(bucket, min, max, mean)] of one column, finest level first"""
+    values = np.asarray(values, dtype=np.float64)
+    rows = len(values)
+    levels = []
+    if rows <= BASE_BUCKET:
+        return levels
+    low, high, total = summarize_buckets(values, values, values, BASE_BUCKET)
+    bucket = BASE_BUCKET
+    while True:
+        counts = np.minimum(bucket, rows - np.arange(len(low)) * bucket)
+        levels.append((bucket, low, high, total / counts))
+        if len(low) <= TOP_BUCKETS:
+            return levels
+        low, high, total = summarize_buckets(low, high, total, 2)
+        bucket *= 2
+
+class RunPyramid:
+    """Lazily built or loaded pyramid levels of every column of `data`"""
+    def __init__(self, data, stored=None):
+        self.data = data
+        self.stored = stored
+        self.levels = {}
+        self.lock = threading.Lock()
+
+    def column(self, name):
+        with self.lock:
+            levels = self.levels.get(name)
+            if levels is None:
+                if self.stored is not None:
+                    levels = stored_levels(self.stored, name)
+                else:
+                    levels = build_levels(getattr(self.data, name))
+                self.levels[name] = levels
+            return levels
+
+    def view(self, name, x_start, x_stop, budget, x_name='time', scale=1.0, envelope=True):
+        """(x, y) of `name` against the monotonic `x_name` over [x_start, x_stop], in about `budget` points.
+
+        With `envelope` each bucket contributes its min and max, so peaks
+        survive at every zoom; otherwise its mean.
+        """
+        x = getattr(self.data, x_name)
+        y = getattr(self.data, name)
+        start = max(int(np.searchsorted(x, x_start, side='left')) - 1, 0)
+        stop = min(int(np.searchsorted(x, x_stop, side='right')) + 1, len(x))
+        if stop - start <= budget * BASE_BUCKET or not self.column(name):
+            return minmax_downsample(x[start:stop], y[start:stop] * scale, budget)
+
+        for bucket, low, high, mean in self.column(name):
+            first, last = start // bucket, -(-stop // bucket)
+            if last - first <= budget // 2:
+                break
+        bucket_x = x[first * bucket:last * bucket:bucket]
+        if not envelope:
+            return bucket_x, mean[first:last] * scale
+        points = np.empty(2 * (last - first))
+        points[0::2] = low[first:last]
+        points[1::2] = high[first:last]
+        return np.repeat(bucket_x, 2), points * scale
+
+    def series(self, name, x_name='time', scale=1.0):
+        return PyramidSeries(self, name, x_name, scale)
+
+class PyramidSeries:
+    """One column of a pyramid bound to its x column and display scale"""
+    def __init__(self, pyramid, name, x_name='time', scale=1.0):
+        self.pyramid = pyramid
+        self.name = name
+        self.x_name = x_name
+        self.scale = scale
+
+    @property
+    def x_range(self):
+        x = getattr(self.pyramid.data, self.x_name)
+        return (float(x[0]), float(x[-1])) if len(x) else (0.0, 0.0)
+
+    def view(self, x_start, x_stop, budget):
+        return self.pyramid.view(self.name, x_start, x_stop, budget, self.x_name, self.scale)
+
+def pyramid_path(filename):
+    stem = csv_stem(filename)
+    if stem == filename:
+        stem = os.path.splitext(filename)[0]
+    return stem + PYRAMID_SUFFIX
+
+def file_signature(filename):
+    stat = os.stat(filename)
+    return np.array([PYRAMID_FORMAT_VERSION, stat.st_mtime_ns, stat.st_size, BASE_BUCKET], dtype=np.int64)
+
+def stored_levels(stored, name):
+    levels = []
+    bucket = BASE_BUCKET
+    while f"{name}.{bucket}.min" in stored:
+        levels.append((
+            bucket, stored[f"{name}.{bucket}.min"], stored[f"{name}.{bucket}.max"], stored[f"{name}.{bucket}.mean"]
+        ))
+        bucket *= 2
+    return levels
+
+def save_pyramid(data, filename):
+    """Build the pyramid of every column of the run in `filename` and store it beside the run"""
+    arrays = {'signature': file_signature(filename)}
+    for name in COLUMNS:
+        for bucket, low, high, mean in build_levels(getattr(data, name)):
+            arrays[f"{name}.{bucket}.min"] = low
+            arrays[f"{name}.{bucket}.max"] = high
+            arrays[f"{name}.{bucket}.mean"] = mean
+    path = pyramid_path(filename)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary, path)
+
+def load_pyramid(filename, data):
+    """RunPyramid of the run in `filename` (loaded as `data`), stored beside it on first use"""
+    path = pyramid_path(filename)
+    try:
+        stored = np.load(path, allow_pickle=False)
+        if np.array_equal(stored['signature'], file_signature(filename)):
+            return RunPyramid(data, stored)
+        stored.close()
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        save_pyramid(data, filename)
+        return RunPyramid(data, np.load(path, allow_pickle=False))
+    except OSError:
+        return RunPyramid(data)  # the stored pyramid is an optimization; build in memory
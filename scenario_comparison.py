@@ -0,0 +1,137 @@
+"""Compare any number of runs on a common distance or progress grid.
+
+    python vehicle_analysis.py --compare runs/ 'archive/*.vsr' --compare-axis progress
+
+Runs of different durations do not line up in time, so every run is
+resampled onto one grid: distance travelled, from 0 to the shortest run's
+distance so that every run covers the whole grid, or progress, from 0 to
+1 of each run's own distance. A single searchsorted per run gives the
+interpolation weights for all columns at once, and per-run metrics and
+the N x N pairwise deltas are then array operations on the resulting
+(runs, columns, points) block.
+"""
+import numpy as np
+from simulation_data import COLUMNS
+
+GRID_POINTS = 2000
+AXES = ('distance', 'progress')
+
+# Pairwise delta matrices; entry [i, j] is run j minus run i
+PAIRWISE_METRICS = ('fuel_gap_per_100km', 'drag_delta', 'speed_delta', 'altitude_rms')
+
+def resample(table, distance, grid):
+    """(len(COLUMNS), len(grid)) linear interpolation of every column at the given distances"""
+    index = np.clip(np.searchsorted(distance, grid, side='right'), 1, len(distance) - 1)
+    left = distance[index - 1]
+    span = distance[index] - left
+    weight = np.divide(grid - left, span, out=np.zeros(len(grid)), where=span > 0)
+    np.clip(weight, 0.0, 1.0, out=weight)
+    return table[:, index - 1] * (1.0 - weight) + table[:, index] * weight
+
+class Comparison:
+    """Runs resampled onto one grid, with their per-run and pairwise metrics.
+
+    `runs` are the (name, SimulationData) runs that were compared;
+    `values[r, c, k]` is column COLUMNS[c] of run r at grid point k;
+    `covered` is the distance (m) each run travels over the grid.
+    """
+    def __init__(self, runs, axis, grid, values, covered, totals):
+        self.runs = runs
+        self.names = [name for name, _ in runs]
+        self.axis = axis
+        self.grid = grid
+        self.values = values
+        self.covered = covered
+        self.totals = totals
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, name):
+        """(runs, points) values of one column"""
+        return self.values[:, COLUMNS.index(name)]
+
+    def grid_fuel(self):
+        """Fuel (L) each run uses over the grid"""
+        fuel = self.column('cumulative_fuel')
+        return fuel[:, -1] - fuel[:, 0]
+
+    def fuel_per_100km(self):
+        return np.divide(self.grid_fuel() * 100000.0, self.covered, out=np.zeros(len(self)), where=self.covered > 0)
+
+    def aligned_altitude(self):
+        """Altitude relative to each run's altitude at the start of the grid"""
+        altitude = self.column('altitude')
+        return altitude - altitude[:, :1]
+
+    def pairwise(self):
+        """{metric: (runs, runs) matrix} for PAIRWISE_METRICS, entry [i, j] being run j against run i.
+
+        altitude_rms is the RMS difference of the start-aligned altitude
+        profiles; it comes from the Gram matrix of the profiles, so memory
+        stays O(runs * points) however many pairs there are.
+        """
+        def delta(per_run):
+            return per_run[np.newaxis, :] - per_run[:, np.newaxis]
+
+        altitude = self.aligned_altitude()
+        squares = np.einsum('ij,ij->i', altitude, altitude)
+        gram = altitude @ altitude.T
+        mean_square = (squares[:, np.newaxis] + squares[np.newaxis, :] - 2.0 * gram) / altitude.shape[1]
+        return {
+            'fuel_gap_per_100km': delta(self.fuel_per_100km()),
+            'drag_delta': delta(self.column('drag').mean(axis=1)),
+            'speed_delta': delta(self.column('speed').mean(axis=1)),
+            'altitude_rms': np.sqrt(np.maximum(mean_square, 0.0)),
+        }
+
+    def pairwise_rows(self):
+        """(run, other, metric values...) for every ordered pair of distinct runs"""
+        matrices = self.pairwise()
+        rows = []
+        for i, name in enumerate(self.names):
+            for j, other in enumerate(self.names):
+                if i != j:
+                    rows.append((name, other) + tuple(float(matrices[metric][i, j]) for metric in PAIRWISE_METRICS))
+        return rows
+
+def compare_runs(runs, axis='distance', points=GRID_POINTS):
+    """Comparison of (name, SimulationData) runs on a `points`-point grid along `axis` (see AXES).
+
+    Runs with fewer than two samples or no distance covered cannot be
+    placed on the grid and are skipped with a warning; at least two runs
+    must remain.
+    """
+    if axis not in AXES:
+        raise ValueError(f"Unknown comparison axis '{axis}'; choose from {', '.join(AXES)}")
+    valid, tables, distances = [], [], []
+    for name, data in runs:
+        if data.get_size() < 2:
+            print(f"WARNING: Run '{name}' has fewer than two samples, skipped.")
+            continue
+        distance = data.metrics['cumulative_distance']
+        if distance[-1] <= 0:
+            print(f"WARNING: Run '{name}' covers no distance, skipped.")
+            continue
+        valid.append((name, data))
+        tables.append(data.table)
+        distances.append(distance)
+    if len(valid) < 2:
+        raise ValueError(f"Need at least two runs with samples and distance to compare, got {len(valid)}")
+    totals = [(float(table[COLUMNS.index('cumulative_fuel'), -1]), float(distance[-1]))
+              for table, distance in zip(tables, distances)]
+
+    if axis == 'distance':
+        shortest = min(distance[-1] for distance in distances)
+        grid = np.linspace(0.0, shortest, points)
+        run_grids = [grid] * len(tables)
+        covered = np.full(len(tables), shortest)
+    else:
+        grid = np.linspace(0.0, 1.0, points)
+        run_grids = [grid * distance[-1] for distance in distances]
+        covered = np.array([distance[-1] for distance in distances])
+
+    values = np.empty((len(tables), len(COLUMNS), points))
+    for r, (table, distance, run_grid) in enumerate(zip(tables, distances, run_grids)):
+        values[r] = resample(table, distance, run_grid)
+    return Comparison(valid, axis, grid, values, covered, totals)
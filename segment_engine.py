@@ -0,0 +1,233 @@
+"""Whole-trip totals of runSimulation without stepping through every second.
+
+Within each phase of scenarios 1 and 2 the speed is constant or a linear
+ramp in the step index and the slope is constant. Each phase is split
+further where the drag coefficient changes band (calculate_cd_from_reynolds)
+or the speed reaches the 1 m/s floor of get_speed_profile; those change
+points are found by bisection on the real profile functions, so the band
+every step falls in is the same as in the stepped engine. On each of the
+resulting segments drag, rolling, slope and inertial work are sums of
+polynomials in the step index up to cubic, which are evaluated in closed
+form with Faulhaber's formulas. A trip is reduced to a few dozen segments
+whatever its length, and the totals match the stepped engine to a relative
+tolerance of ANALYTIC_RTOL.
+
+Scenario 3 (sinusoidal speed and slope) has no such closed form and falls
+back to summing the stepped engine chunk by chunk.
+"""
+import argparse
+import math
+import numpy as np
+import vehicle_engine
+from simulation_data import COLUMNS
+from vehicle_engine import (
+    AIR_DENSITY, AIR_VISCOSITY, CD_REYNOLDS_BREAKPOINTS, calculate_aerodynamic_drag, calculate_cd_from_reynolds,
+    calculate_fuel_volume, calculate_reynolds, calculate_rolling_resistance,
+    calculate_slope_resistance, get_speed_profile, get_terrain_slope, simulation_steps
+)
+
+ANALYTIC_RTOL = 1e-9
+
+TOTAL_FIELDS = (
+    'total_fuel', 'fuel_per_100km', 'distance', 'drag_work', 'rolling_work',
+    'slope_work', 'inertial_work', 'max_drag'
+)
+
+def phase_breakpoints(scenario, steps, total_time, dt=1.0):
+    """Step indices where the speed formula or the slope of a scenario changes, or None"""
+    if scenario == 1:
+        points = [math.ceil(steps * 0.2), math.ceil(steps * 0.8)]
+    elif scenario == 2:
+        points = [steps // 2] + [math.ceil(total_time * share / dt) for share in (0.25, 0.5, 0.75)]
+    else:
+        return None
+    return sorted(set(min(max(point, 0), steps) for point in [0, steps] + points))
+
+def finish_totals(totals, vehicle):
+    work = totals['drag_work'] + totals['rolling_work'] + totals['slope_work'] + totals['inertial_work']
+    totals['total_fuel'] = float(calculate_fuel_volume(work, vehicle.efficiency))
+    if totals['distance'] > 0:
+        totals['fuel_per_100km'] = totals['total_fuel'] / totals['distance'] * 100000.0
+    return totals
+
+def power_sums(n):
+    """Sums of j, j**2 and j**3 for j in range(n), elementwise"""
+    n = np.asarray(n, dtype=np.float64)
+    s1 = n * (n - 1) / 2
+    s2 = (n - 1) * n * (2 * n - 1) / 6
+    return s1, s2, s1 * s1
+
+def band_flags(speed, length):
+    """Per step: which Cd breakpoints its Reynolds number has reached, and whether it is at the speed floor"""
+    reynolds = calculate_reynolds(speed, length)
+    return np.column_stack((reynolds[:, None] >= CD_REYNOLDS_BREAKPOINTS, speed <= 1.0))
+
+def band_changes(speed_at, length, starts, stops):
+    """Steps where a drag band or the floor state changes inside the phases [starts, stops).
+
+    Within a phase the speed is monotone, so every flag of band_flags
+    changes at most once. The change is first looked for where the ramp
+    through the phase's first two steps crosses the flag's threshold, which
+    is exact for an unclamped ramp; flags not settled by that guess are
+    bisected, all (phase, flag) pairs together.
+    """
+    thresholds = np.append(CD_REYNOLDS_BREAKPOINTS * AIR_VISCOSITY / (AIR_DENSITY * length), 1.0)
+    phase = np.repeat(np.arange(len(starts)), len(thresholds))
+    flag = np.tile(np.arange(len(thresholds)), len(starts))
+    pairs = np.arange(len(phase))
+    probes = np.concatenate((starts, np.minimum(starts + 1, stops - 1), stops - 1))
+    first, second, last = speed_at(probes).reshape(3, -1)[:, phase]
+    reference = band_flags(first, length)[pairs, flag]
+    unchanged = band_flags(last, length)[pairs, flag] == reference
+    low = np.where(unchanged, stops[phase], starts[phase] + 1)
+    high = stops[phase]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.ceil((thresholds[flag] - first) / (second - first))
+    guess = starts[phase] + np.clip(np.nan_to_num(offset), 1, stops[phase] - starts[phase])
+    guess = np.clip(guess.astype(np.int64), low, np.maximum(high - 1, low))
+    around = band_flags(speed_at(np.concatenate((guess - 1, guess))), length)
+    same_before = around[pairs, flag] == reference
+    same_at = around[len(pairs) + pairs, flag] == reference
+    active = low < high
+    low = np.where(active & same_at, guess + 1, np.where(active & same_before, guess, low))
+    high = np.where(active & ~same_at, np.where(same_before, guess, guess - 1), high)
+
+    while True:
+        active = low < high
+        if not active.any():
+            return low[low < stops[phase]]
+        middle = (low + high) // 2
+        same = band_flags(speed_at(middle), length)[pairs, flag] == reference
+        low = np.where(active & same, middle + 1, low)
+        high = np.where(active & ~same, middle, high)
+
+def analytic_totals(vehicle, distance_km, speed_kmh, scenario, dt=1.0):
+    """Trip totals from closed-form segment sums, or None if the scenario has no closed form"""
+    base_speed = speed_kmh * 1000.0 / 3600.0
+    steps, total_time = simulation_steps(distance_km, speed_kmh)
+    phases = phase_breakpoints(scenario, steps, total_time, dt)
+    if phases is None:
+        return None
+    totals = dict.fromkeys(TOTAL_FIELDS, 0.0)
+    totals['segments'] = 0
+    if steps == 0:
+        return totals
+
+    def speed_at(step):
+        return get_speed_profile(scenario, step, steps, base_speed)
+
+    phases = np.array(phases, dtype=np.int64)
+    phase_starts, phase_stops = phases[:-1], phases[1:]
+    bounds = np.unique(np.concatenate((
+        phases, band_changes(speed_at, vehicle.length, phase_starts, phase_stops)
+    )))
+    starts, stops = bounds[:-1], bounds[1:]
+    n = stops - starts
+
+    first = speed_at(starts)
+    last = speed_at(stops - 1)
+    previous = np.where(starts > 0, speed_at(np.maximum(starts - 1, 0)), base_speed)
+    rate = np.where(n > 1, (last - first) / np.maximum(n - 1, 1), 0.0)
+    slope = get_terrain_slope(scenario, starts * dt, total_time)
+    cd = calculate_cd_from_reynolds(calculate_reynolds(first, vehicle.length))
+
+    s1, s2, s3 = power_sums(n)
+    sum_speed = n * first + rate * s1
+    sum_cubed = n * first ** 3 + 3 * first * first * rate * s1 + 3 * first * rate * rate * s2 + rate ** 3 * s3
+    entry_acceleration = np.maximum((first - previous) / dt, 0.0)
+
+    totals['segments'] = len(starts)
+    totals['drag_work'] = float(np.dot(0.5 * AIR_DENSITY * cd * vehicle.frontal_area, sum_cubed)) * dt
+    totals['rolling_work'] = float(np.dot(calculate_rolling_resistance(vehicle.mass, slope), sum_speed)) * dt
+    totals['slope_work'] = float(np.dot(calculate_slope_resistance(vehicle.mass, slope), sum_speed)) * dt
+    totals['inertial_work'] = vehicle.mass * float(
+        np.dot(entry_acceleration, first) * dt + np.dot(np.maximum(rate, 0.0), sum_speed - first)
+    )
+    # calculate_total_distance leaves out the first step
+    totals['distance'] = (float(sum_speed.sum()) - first[0]) * dt
+    totals['max_drag'] = float(max(
+        calculate_aerodynamic_drag(cd, vehicle.frontal_area, first).max(),
+        calculate_aerodynamic_drag(cd, vehicle.frontal_area, last).max()
+    ))
+    return finish_totals(totals, vehicle)
+
+def stepped_totals(vehicle, distance_km, speed_kmh, scenario, dt=1.0):
+    """The same totals summed over every step of vehicle_engine, one chunk at a time"""
+    index = dict((name, i) for i, name in enumerate(COLUMNS))
+    totals = dict.fromkeys(TOTAL_FIELDS, 0.0)
+    totals['segments'] = 0
+    first_speed = None
+    for _, _, table in vehicle_engine.iter_simulation(vehicle, distance_km, speed_kmh, scenario, dt=dt):
+        speed = table[index['speed']]
+        acceleration = table[index['acceleration']]
+        drag = table[index['drag']]
+        dx = speed * dt
+        totals['drag_work'] += float(np.dot(drag, dx))
+        totals['rolling_work'] += float(np.dot(table[index['rolling_resistance']], dx))
+        totals['slope_work'] += float(np.dot(table[index['slope_resistance']], dx))
+        totals['inertial_work'] += float(np.dot(np.where(acceleration > 0, vehicle.mass * acceleration, 0.0), dx))
+        totals['distance'] += float(dx.sum())
+        totals['max_drag'] = max(totals['max_drag'], float(drag.max()))
+        if first_speed is None:
+            first_speed = speed[0]
+    if first_speed is not None:
+        totals['distance'] -= first_speed * dt
+    return finish_totals(totals, vehicle)
+
+def trip_totals(vehicle, distance_km, speed_kmh, scenario, dt=1.0, method='auto'):
+    """Whole-trip fuel, distance and work totals of one run.
+
+    `method` is 'analytic', 'stepped' or 'auto' (analytic where the
+    scenario allows it). The result has every key in TOTAL_FIELDS plus
+    'method' and 'segments' (number of closed-form segments used).
+    """
+    totals = None
+    if method in ('auto', 'analytic'):
+        totals = analytic_totals(vehicle, distance_km, speed_kmh, scenario, dt)
+        if totals is None and method == 'analytic':
+            raise ValueError(f"Scenario {scenario} has no closed-form speed and slope profile")
+    elif method != 'stepped':
+        raise ValueError(f"Unknown integration method: {method}")
+    if totals is None:
+        totals = stepped_totals(vehicle, distance_km, speed_kmh, scenario, dt)
+        totals['method'] = 'stepped'
+    else:
+        totals['method'] = 'analytic'
+    return totals
+
+def simulate_totals(params, scenario, method='auto'):
+    """trip_totals from a GUI-style parameter dict (mass, width, ..., distance, speed)"""
+    return trip_totals(
+        vehicle_engine.vehicle_from_params(params), params['distance'], params['speed'], scenario, method=method
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-trip fuel totals without per-second stepping")
+    parser.add_argument("--mass", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['mass'])
+    parser.add_argument("--width", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['width'])
+    parser.add_argument("--height", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['height'])
+    parser.add_argument("--length", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['length'])
+    parser.add_argument("--efficiency", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['efficiency'])
+    parser.add_argument("--speed", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['speed'], help="cruise speed (km/h)")
+    parser.add_argument("--distance", type=float, default=vehicle_engine.DEFAULT_PARAMETERS['distance'], help="trip distance (km)")
+    parser.add_argument("--scenario", type=int, nargs='+', default=list(vehicle_engine.SCENARIOS))
+    parser.add_argument("--check", action="store_true", help="also run the stepped engine and report the difference")
+    args = parser.parse_args()
+
+    params = dict(
+        mass=args.mass, width=args.width, height=args.height, length=args.length,
+        efficiency=args.efficiency, distance=args.distance, speed=args.speed
+    )
+    for scenario in args.scenario:
+        totals = simulate_totals(params, scenario)
+        print(f"Scenario {scenario} ({totals['method']}, {totals['segments']} segments): "
+              f"{totals['total_fuel']:.6f} L, {totals['fuel_per_100km']:.4f} L/100km, "
+              f"{totals['distance'] / 1000:.3f} km")
+        if args.check:
+            stepped = simulate_totals(params, scenario, method='stepped')
+            error = abs(totals['total_fuel'] - stepped['total_fuel']) / stepped['total_fuel']
+            print(f"  stepped: {stepped['total_fuel']:.6f} L, relative difference {error:.2e}")
+
+if __name__ == "__main__":
+    main()
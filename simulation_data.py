@@ -0,0 +1,222 @@
+import gzip
+import lzma
+import os
+import queue
+import threading
+import warnings
+import numpy as np
+from run_metrics import BUILTIN_METRICS
+
+COLUMNS = (
+    'time', 'speed', 'acceleration', 'drag', 'rolling_resistance',
+    'slope_resistance', 'total_resistance', 'fuel', 'cumulative_fuel',
+    'reynolds', 'cd', 'altitude', 'slope'
+)
+
+STREAM_CHUNK_ROWS = 65536
+# Rows of a run CSV are about 100 characters; blocks are read at this size per row
+ROW_CHARS = 128
+
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.xz')
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.xz': lzma.open}
+COMPRESSION_MAGIC = {b'\x1f\x8b': '.gz', b'\xfd7zXZ\x00': '.xz'}
+# xz above preset 0 writes run tables several times slower for almost no gain
+COMPRESSION_OPTIONS = {'.gz': {'compresslevel': 6}, '.xz': {'preset': 0}}
+WRITER_QUEUE_CHUNKS = 4
+
+# name -> (function(metrics), names of the columns and metrics it reads)
+METRIC_DEFINITIONS = {}
+
+def derived_metric(name, depends):
+    """Register `function(metrics)` as the lazily computed metric `name`.
+
+    `depends` lists the COLUMNS and other metrics the function reads, so
+    that invalidating any of them also drops every metric derived from it.
+    """
+    def register(function):
+        unknown = [dependency for dependency in depends if dependency not in COLUMNS and dependency not in METRIC_DEFINITIONS]
+        if unknown:
+            raise ValueError(f"Metric '{name}' depends on unknown names: {', '.join(unknown)}")
+        METRIC_DEFINITIONS[name] = (function, tuple(depends))
+        return function
+    return register
+
+for name, (function, depends) in BUILTIN_METRICS.items():
+    derived_metric(name, depends)(function)
+
+class RunMetrics:
+    """Derived quantities of one SimulationData, each computed on first access and then cached"""
+    def __init__(self, data):
+        self.data = data
+        self.values = {}
+
+    def __getitem__(self, name):
+        if name not in self.values:
+            function, _ = METRIC_DEFINITIONS[name]
+            self.values[name] = function(self)
+        return self.values[name]
+
+    def dependents(self, names):
+        """`names` plus every metric that reads any of them, directly or through other metrics"""
+        found = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for metric, (_, depends) in METRIC_DEFINITIONS.items():
+                if metric not in found and found.intersection(depends):
+                    found.add(metric)
+                    changed = True
+        return found
+
+    def invalidate(self, *names):
+        """Drop the cached metrics that depend on the given columns or metrics (all of them by default)"""
+        if not names:
+            self.values.clear()
+            return
+        for name in self.dependents(names):
+            self.values.pop(name, None)
+
+class SimulationData:
+    """Columnar simulation results, one contiguous float64 array per column.
+
+    `metrics` holds the derived quantities (see derived_metric), so each
+    is computed at most once per dataset; after modifying columns in place
+    call metrics.invalidate with their names.
+    """
+    def __init__(self, table=None):
+        if table is None:
+            table = np.empty((len(COLUMNS), 0), dtype=np.float64)
+        self.table = table
+        for index, name in enumerate(COLUMNS):
+            setattr(self, name, self.table[index])
+        self.metrics = RunMetrics(self)
+
+    def get_size(self):
+        return self.table.shape[1]
+
+def compression_of(filename):
+    """'.gz' or '.xz' when the file is compressed, judged from its first bytes; otherwise None"""
+    with open(filename, "rb") as file:
+        head = file.read(6)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_csv(filename, mode="r"):
+    """Text handle on a run CSV, gzip/xz-compressed or plain.
+
+    Reading detects the compression from the content, writing picks it
+    from the extension (.csv.gz, .csv.xz).
+    """
+    if 'r' in mode:
+        compression = compression_of(filename)
+        options = {}
+    else:
+        compression = os.path.splitext(filename)[1]
+        options = COMPRESSION_OPTIONS.get(compression, {})
+    if compression not in COMPRESSED_OPENERS:
+        return open(filename, mode)
+    return COMPRESSED_OPENERS[compression](filename, mode + "t", **options)
+
+def csv_stem(filename):
+    """File name without its (possibly compressed) CSV extension"""
+    for extension in sorted(CSV_EXTENSIONS, key=len, reverse=True):
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+def read_csv_header(file):
+    """Column indices of COLUMNS, found by name in the header line"""
+    header = file.readline().strip().split(',')
+    missing = [name for name in COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"not a simulation run CSV: missing column(s) {', '.join(missing)}")
+    return [header.index(name) for name in COLUMNS]
+
+def parse_csv_rows(lines, usecols):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        rows = np.loadtxt(lines, delimiter=',', usecols=usecols, dtype=np.float64, ndmin=2)
+    if rows.size == 0:
+        return np.empty((len(COLUMNS), 0), dtype=np.float64)
+    return np.ascontiguousarray(rows.T)
+
+def parse_csv_columns(file):
+    chunks = list(iter_csv_chunks(file))
+    if not chunks:
+        return np.empty((len(COLUMNS), 0), dtype=np.float64)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks, axis=1)
+
+def iter_csv_chunks(file, chunk_rows=STREAM_CHUNK_ROWS):
+    """(len(COLUMNS), rows) tables of about chunk_rows rows each.
+
+    The file is read in large blocks cut at the last line break, so a
+    compressed file is inflated a block at a time instead of a line at a
+    time.
+    """
+    usecols = read_csv_header(file)
+    rest = ""
+    while True:
+        block = file.read(chunk_rows * ROW_CHARS)
+        if not block:
+            break
+        block = rest + block
+        cut = block.rfind("\n") + 1
+        rest = block[cut:]
+        if cut:
+            yield parse_csv_rows(block[:cut].splitlines(), usecols)
+    if rest.strip():
+        yield parse_csv_rows([rest], usecols)
+
+class CsvChunkWriter:
+    """Append run tables to a CSV, plain or compressed by extension, from a background thread.
+
+    write() queues a (len(COLUMNS), rows) table and returns at once; the
+    thread formats and compresses it while the caller computes the next
+    one, so tables must not be modified after they are written. The queue
+    is bounded, so a slow disk holds the producer back instead of
+    buffering the run.
+    """
+    def __init__(self, filename, queue_chunks=WRITER_QUEUE_CHUNKS):
+        self.file = open_csv(filename, "w")
+        self.file.write(",".join(COLUMNS) + "\n")
+        self.queue = queue.Queue(queue_chunks)
+        self.error = None
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def drain(self):
+        while True:
+            table = self.queue.get()
+            if table is None:
+                return
+            if self.error is None:
+                try:
+                    np.savetxt(self.file, table.T, fmt='%.6g', delimiter=',')
+                except Exception as e:
+                    self.error = e
+
+    def write(self, table):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(table)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def save_csv_file(data, filename):
+    """Write results in the same layout and precision as saveResultsToCSV (.csv.gz/.csv.xz compress)"""
+    with open_csv(filename, "w") as file:
+        file.write(",".join(COLUMNS) + "\n")
+        np.savetxt(file, data.table.T, fmt='%.6g', delimiter=',')
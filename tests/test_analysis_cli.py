@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_cli(tmp_path, *args):
+    """Run vehicle_analysis.main in a fresh interpreter; fails unless matplotlib stayed unimported"""
+    script = (
+        "import sys, vehicle_analysis\n"
+        f"vehicle_analysis.main({list(args)!r})\n"
+        "assert 'matplotlib' not in sys.modules, 'matplotlib was imported'\n"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO, MPLBACKEND="Agg")
+    env.pop("VEHICLE_SIM_TRACE", None)
+    return subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=300
+    )
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_stats_only_writes_reports_without_plotting(tmp_path, jobs):
+    result = run_cli(tmp_path, "--simulate", "--stats-only", "-j", jobs)
+    assert result.returncode == 0, result.stderr
+    assert "All reports have been generated." in result.stdout
+    files = os.listdir(tmp_path)
+    assert any(name.startswith("summary_report_") for name in files)
+    assert any(name.startswith("correlation_matrix_") for name in files)
+    assert "scenario_comparison_pairwise.csv" in files
+    assert not [name for name in files if name.endswith(".png")]
+
+def test_stats_only_and_no_show_are_exclusive(tmp_path):
+    result = run_cli(tmp_path, "--stats-only", "--no-show")
+    assert result.returncode != 0 and "not allowed with argument" in result.stderr
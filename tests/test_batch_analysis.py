@@ -0,0 +1,41 @@
+import os
+import numpy as np
+import batch_analysis
+import vehicle_analysis
+from run_format import load_run
+from simulation_data import COLUMNS, save_csv_file
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+def test_correlation_matrix_beside_runs_is_skipped(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    data = simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1)
+    save_csv_file(data, "simulation_scenario_1.csv")
+    vehicle_analysis.export_correlation_matrix(vehicle_analysis.calculate_correlation_matrix(data), "scenario_1")
+
+    paths = batch_analysis.find_run_files([str(tmp_path)])
+    assert paths == [os.path.abspath("simulation_scenario_1.csv")]
+    assert "WARNING" not in capsys.readouterr().out
+
+    written, analyzed, reused, failed = batch_analysis.run_batch([str(tmp_path)], "metrics.csv")
+    assert (written, analyzed, reused, failed) == (1, 1, 0, 0)
+    row = batch_analysis.load_batch_table("metrics.csv")[paths[0]]
+    assert np.isclose(float(row['total_fuel']), data.cumulative_fuel[-1], rtol=1e-5)
+
+def test_foreign_csv_is_skipped_with_a_warning(tmp_path, capsys):
+    (tmp_path / "notes.csv").write_text("a,b\n1,2\n")
+    (tmp_path / "extra.csv").write_text(",".join(COLUMNS + ("note",)) + "\n" + ",".join(["1"] * 14) + "\n")
+
+    assert batch_analysis.find_run_files([str(tmp_path)]) == []
+    out = capsys.readouterr().out
+    assert "notes.csv is not a run file" in out and "extra.csv is not a run file" in out
+
+def test_loader_maps_columns_by_name(tmp_path):
+    data = simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1)
+    save_csv_file(data, str(tmp_path / "run.csv"))
+    lines = (tmp_path / "run.csv").read_text().splitlines()
+    order = list(reversed(range(len(COLUMNS))))
+    reordered = [",".join([line.split(",")[i] for i in order] + ["x"]) for line in lines]
+    reordered[0] = reordered[0][:-1] + "note"
+    (tmp_path / "reordered.csv").write_text("\n".join(reordered) + "\n")
+
+    assert np.array_equal(load_run(str(tmp_path / "reordered.csv")).table, load_run(str(tmp_path / "run.csv")).table)
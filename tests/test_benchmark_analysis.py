@@ -0,0 +1,19 @@
+import os
+import sys
+import numpy as np
+import pytest
+from run_format import load_run
+from vehicle_engine import DEFAULT_PARAMETERS, SCENARIOS, simulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import benchmark_analysis
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+@pytest.mark.parametrize('rows', [1000, 10000])
+def test_generated_run_matches_simulation(tmp_path, scenario, rows):
+    filename = benchmark_analysis.generate_run(scenario, rows, str(tmp_path))
+    data = load_run(filename)
+    expected = simulate(dict(DEFAULT_PARAMETERS, distance=benchmark_analysis.trip_for_rows(rows)), scenario)
+
+    assert data.get_size() == rows
+    np.testing.assert_allclose(data.table, expected.table, rtol=1e-5, atol=1e-6)
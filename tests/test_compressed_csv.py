@@ -0,0 +1,64 @@
+import gzip
+import io
+import lzma
+import numpy as np
+import pytest
+from run_format import load_run
+from simulation_data import (
+    COLUMNS, CsvChunkWriter, compression_of, iter_csv_chunks, open_csv, parse_csv_columns, save_csv_file
+)
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+@pytest.fixture(scope="module")
+def data():
+    return simulate(dict(DEFAULT_PARAMETERS, distance=5.0), 2)
+
+@pytest.mark.parametrize("compress, compression", [(gzip.compress, '.gz'), (lzma.compress, '.xz'), (bytes, None)])
+def test_compression_is_detected_from_the_content(tmp_path, data, compress, compression):
+    plain = tmp_path / "plain.csv"
+    save_csv_file(data, str(plain))
+    # The extension says nothing about the content
+    disguised = tmp_path / "run.csv.gz.csv"
+    disguised.write_bytes(compress(plain.read_bytes()))
+
+    assert compression_of(str(disguised)) == compression
+    np.testing.assert_array_equal(load_run(str(disguised)).table, load_run(str(plain)).table)
+
+def test_chunks_join_lines_cut_at_block_boundaries(data):
+    text = io.StringIO()
+    text.write(",".join(COLUMNS) + "\n")
+    np.savetxt(text, data.table.T, fmt='%.6g', delimiter=',')
+    whole = parse_csv_columns(io.StringIO(text.getvalue()))
+
+    # One-row blocks are shorter than some lines, so most blocks end mid-line
+    chunks = list(iter_csv_chunks(io.StringIO(text.getvalue()), chunk_rows=1))
+    assert len(chunks) > 1 and all(chunk.shape[0] == len(COLUMNS) for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=1), whole)
+
+    # A last line without a line break is still read
+    unterminated = text.getvalue().rstrip("\n")
+    chunks = list(iter_csv_chunks(io.StringIO(unterminated), chunk_rows=3))
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=1), whole)
+
+def test_header_only_csv_has_no_chunks():
+    assert list(iter_csv_chunks(io.StringIO(",".join(COLUMNS) + "\n"))) == []
+
+@pytest.mark.parametrize("extension", ['.csv.gz', '.csv.xz'])
+def test_chunk_writer_compresses_by_extension(tmp_path, data, extension):
+    plain = tmp_path / "run.csv"
+    compressed = tmp_path / ("run" + extension)
+    save_csv_file(data, str(plain))
+    with CsvChunkWriter(str(compressed), queue_chunks=1) as writer:
+        for start in range(0, data.get_size(), 37):
+            writer.write(data.table[:, start:start + 37])
+
+    assert compression_of(str(compressed)) == extension[-3:]
+    with open_csv(str(compressed)) as file:
+        assert file.read() == plain.read_text()
+    np.testing.assert_array_equal(load_run(str(compressed)).table, load_run(str(plain)).table)
+
+def test_chunk_writer_reports_write_errors(tmp_path, data):
+    writer = CsvChunkWriter(str(tmp_path / "run.csv"))
+    writer.write(np.zeros((2, 3, 4)))
+    with pytest.raises(ValueError):
+        writer.close()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import vehicle_analysis as analysis
+from simulation_data import COLUMNS, SimulationData
+from vehicle_engine import DEFAULT_PARAMETERS, SCENARIOS, simulate
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+def test_matrix_matches_pairwise_correlations(scenario):
+    data = simulate(dict(DEFAULT_PARAMETERS, distance=20.0), scenario)
+    matrix = analysis.calculate_correlation_matrix(data)
+    assert matrix.shape == (len(COLUMNS), len(COLUMNS))
+    np.testing.assert_allclose(matrix, matrix.T, atol=1e-12)
+    # Constant columns, such as Cd when every Reynolds number falls in one
+    # band, correlate with nothing
+    constant = [np.ptp(values) <= 1e-9 * np.abs(values.mean()) for values in data.table]
+    for i, x in enumerate(data.table):
+        for j, y in enumerate(data.table):
+            expected = 0.0 if constant[i] or constant[j] else analysis.calculate_correlation(x, y)
+            assert matrix[i, j] == pytest.approx(expected, abs=1e-9)
+
+def test_matrix_matches_corrcoef_with_constant_columns_zeroed():
+    rng = np.random.default_rng(11)
+    table = rng.normal(size=(len(COLUMNS), 5000))
+    table[1] = 3.0 * table[0] + 1.0
+    table[2] = -table[0]
+    table[3] = 7.0
+    matrix = analysis.calculate_correlation_matrix(SimulationData(table))
+
+    varying = np.arange(len(COLUMNS)) != 3
+    np.testing.assert_allclose(matrix[np.ix_(varying, varying)], np.corrcoef(table[varying]), atol=1e-12)
+    assert np.all(matrix[3] == 0) and np.all(matrix[:, 3] == 0)
+    assert matrix[0, 1] == pytest.approx(1.0) and matrix[0, 2] == pytest.approx(-1.0)
+
+def test_spearman_uses_average_ranks():
+    table = np.zeros((len(COLUMNS), 5))
+    table[0] = [1.0, 2.0, 2.0, 3.0, 10.0]
+    table[1] = [1.0, 4.0, 4.0, 9.0, 100.0]
+    table[2] = [5.0, 4.0, 3.0, 2.0, 1.0]
+    np.testing.assert_array_equal(analysis.rank_rows(table[:1]), [[0.0, 1.5, 1.5, 3.0, 4.0]])
+
+    data = SimulationData(table)
+    spearman = analysis.calculate_correlation_matrix(data, method='spearman')
+    assert spearman[0, 1] == pytest.approx(1.0)
+    assert spearman[0, 1] > analysis.calculate_correlation_matrix(data)[0, 1]
+    assert spearman[0, 2] == pytest.approx(np.corrcoef(analysis.rank_rows(table[[0, 2]]))[0, 1])
+    with pytest.raises(ValueError):
+        analysis.calculate_correlation_matrix(data, method='kendall')
+
+def test_exported_matrix_reads_back(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    matrix = analysis.calculate_correlation_matrix(simulate(dict(DEFAULT_PARAMETERS, distance=5.0), 2))
+    analysis.export_correlation_matrix(matrix, "run")
+    with open(tmp_path / "correlation_matrix_run.csv") as file:
+        assert file.readline().strip().split(',') == ['column'] + list(COLUMNS)
+        rows = [line.strip().split(',') for line in file]
+    assert [row[0] for row in rows] == list(COLUMNS)
+    np.testing.assert_allclose(np.array([row[1:] for row in rows], dtype=float), matrix, atol=5e-7)
@@ -0,0 +1,16 @@
+import pytest
+from dataset_cache import DatasetCache
+from simulation_data import save_csv_file
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+def test_cached_columns_are_read_only(tmp_path):
+    filename = str(tmp_path / "simulation_scenario_1.csv")
+    save_csv_file(simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1), filename)
+    cache = DatasetCache()
+    data = cache.get(filename)
+    assert cache.get(filename) is data
+
+    with pytest.raises(ValueError):
+        data.speed[0] = 0.0
+    with pytest.raises(ValueError):
+        data.table[0, 0] = 0.0
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from downsampling import grid_downsample, lttb_downsample, minmax_downsample, plot_scatter_downsampled
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    x = np.arange(100_000, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=len(x)))
+    y[54_321] += 1000.0
+    return x, y
+
+def bucket_extremes(y, n_out):
+    bucket = -(-len(y) // (n_out // 2))
+    starts = np.arange(0, len(y), bucket)
+    return np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+def test_minmax_keeps_every_bucket_extreme(series):
+    x, y = series
+    kept_x, kept_y = minmax_downsample(x, y, 500)
+    assert len(kept_x) <= 502 and np.all(np.diff(kept_x) > 0)
+    assert kept_x[0] == x[0] and kept_x[-1] == x[-1]
+    lows, highs = bucket_extremes(y, 500)
+    assert set(lows) | set(highs) <= set(kept_y)
+    assert kept_y.max() == y.max()
+
+def test_short_series_are_not_downsampled(series):
+    x, y = series
+    for downsampler in (minmax_downsample, lttb_downsample):
+        kept_x, kept_y = downsampler(x[:100], y[:100], 500)
+        np.testing.assert_array_equal(kept_y, y[:100])
+
+def test_lttb_keeps_the_budget_and_the_end_points(series):
+    x, y = series
+    kept_x, kept_y = lttb_downsample(x, y, 300)
+    assert len(kept_x) == 300 and np.all(np.diff(kept_x) > 0)
+    assert (kept_x[0], kept_x[-1]) == (x[0], x[-1])
+    assert np.all(np.isin(kept_y, y))
+
+def cells(x, y, extent, columns=120, rows=80):
+    """Grid cells occupied by (x, y), on a grid over the extent of the `extent` samples"""
+    (x_low, y_low), (x_high, y_high) = extent.min(axis=1), extent.max(axis=1)
+    column = np.minimum(((x - x_low) * columns / (x_high - x_low)).astype(int), columns - 1)
+    row = np.minimum(((y - y_low) * rows / (y_high - y_low)).astype(int), rows - 1)
+    return set(zip(column, row))
+
+def test_grid_keeps_one_sample_per_occupied_cell_in_any_order():
+    rng = np.random.default_rng(5)
+    # A scatter of one column against another: x is not ordered
+    x = rng.normal(size=200_000)
+    y = x ** 2 + rng.normal(scale=0.1, size=len(x))
+    x[17] = 25.0
+
+    extent = np.array([x, y])
+    occupied = cells(x, y, extent)
+    kept_x, kept_y = grid_downsample(x, y, 120, 80)
+    assert len(kept_x) == len(occupied) <= 120 * 80
+    assert cells(kept_x, kept_y, extent) == occupied
+    assert 25.0 in kept_x and np.all(np.isin(kept_x, x))
+    # The same cloud comes out of shuffled input
+    order = rng.permutation(len(x))
+    assert cells(*grid_downsample(x[order], y[order], 120, 80), extent) == occupied
+
+def test_grid_handles_flat_and_non_finite_samples():
+    x = np.linspace(0.0, 1.0, 10_000)
+    y = np.full(len(x), 2.0)
+    y[::100] = np.nan
+    kept_x, kept_y = grid_downsample(x, y, 50, 50)
+    assert len(kept_x) == 50 and np.all(kept_y == 2.0)
+    np.testing.assert_array_equal(grid_downsample(x[:10], y[:10], 50, 50)[0], x[1:10])
+
+def test_scatter_plot_is_limited_to_the_pixel_grid():
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    ax = Figure(figsize=(2, 1), dpi=50).add_subplot(111)
+    rng = np.random.default_rng(9)
+    x, y = rng.normal(size=(2, 50_000))
+    line, = plot_scatter_downsampled(ax, x, y, 'r.', markersize=1)
+    extent = ax.get_window_extent()
+    assert 0 < len(line.get_xdata()) <= int(extent.width) * int(extent.height)
+    line, = plot_scatter_downsampled(ax, x, y, 'r.', full_resolution=True)
+    assert len(line.get_xdata()) == len(x)
@@ -0,0 +1,87 @@
+import json
+import threading
+import tracemalloc
+import numpy as np
+import pytest
+from instrumentation import Tracer, traced
+import instrumentation
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracing = tracemalloc.is_tracing()
+    tracer = Tracer()
+    monkeypatch.setattr(instrumentation, "tracer", tracer)
+    yield tracer
+    if not tracing:
+        tracemalloc.stop()
+
+def test_disabled_tracer_records_nothing(tracer):
+    with tracer.span("idle"):
+        pass
+    assert tracer.spans == [] and tracer.summary() == []
+
+def test_spans_record_time_and_memory_peaks(tracer):
+    tracer.enable()
+    with tracer.span("outer", scenario=1):
+        with tracer.span("inner"):
+            block = np.ones(2_000_000)
+        del block
+    inner, outer = tracer.spans
+    assert (inner['name'], outer['name']) == ("inner", "outer")
+    assert outer['args'] == {'scenario': 1}
+    assert outer['start_us'] <= inner['start_us'] and outer['wall_us'] >= inner['wall_us']
+    # The peak of the array freed inside the inner span still counts for the outer one
+    assert inner['peak_bytes'] >= 16_000_000 and outer['peak_bytes'] >= 16_000_000
+
+def test_peaks_survive_spans_on_other_threads(tracer):
+    tracer.enable()
+    allocated = threading.Event()
+    other_done = threading.Event()
+
+    def other():
+        allocated.wait()
+        with tracer.span("other"):
+            pass
+        other_done.set()
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    with tracer.span("main"):
+        block = np.ones(1_000_000)
+        del block
+        allocated.set()
+        other_done.wait()
+    thread.join()
+    main = next(span for span in tracer.spans if span['name'] == "main")
+    assert main['peak_bytes'] >= 8_000_000
+
+def test_traced_functions_and_summary(tracer):
+    @traced
+    def stage(value):
+        return value * 2
+
+    assert stage(2) == 4 and tracer.spans == []
+    tracer.enable()
+    assert stage(3) == 6 and stage(4) == 8
+    tracer.add_spans([dict(tracer.spans[0], name="worker", wall_us=5000, cpu_us=1000)])
+    summary = tracer.summary()
+    assert [row[:2] for row in summary] == [(stage.__qualname__, 2), ("worker", 1)]
+    assert summary[1][2:4] == (5.0, 1.0)
+    assert len(tracer.take_spans()) == 3 and tracer.spans == []
+
+def test_chrome_trace_export(tracer, tmp_path):
+    tracer.enable()
+    with tracer.span("load", file="run.csv"):
+        pass
+    path = tmp_path / "trace.json"
+    tracer.write_trace(str(path))
+
+    trace = json.loads(path.read_text())
+    assert trace['displayTimeUnit'] == 'ms'
+    (event,) = trace['traceEvents']
+    span = tracer.spans[0]
+    assert event['name'] == "load" and event['ph'] == 'X'
+    assert (event['ts'], event['dur'], event['pid'], event['tid']) == (
+        span['start_us'], span['wall_us'], span['pid'], span['tid']
+    )
+    assert event['args'] == {'file': "run.csv", 'cpu_ms': span['cpu_us'] / 1000.0, 'peak_bytes': span['peak_bytes']}
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from monte_carlo import (
+    TripSums, UNCERTAIN_INPUTS, evaluate_trials, parse_distribution, run_monte_carlo, sample_inputs
+)
+from parameter_sweep import trip_profile
+from run_metrics import calculate_co2_emissions, calculate_cost_estimation
+from vehicle_engine import Vehicle, run_simulation
+
+# (mass, width, height, length, efficiency) per trial
+TRIALS = np.array([
+    (1000.0, 2.0, 2.0, 5.0, 0.40),
+    (1450.0, 1.8, 1.5, 4.2, 0.32),
+    (800.0, 1.6, 1.4, 3.5, 0.45),
+])
+
+@pytest.mark.parametrize('scenario', [1, 2, 3])
+@pytest.mark.parametrize('speed_kmh', [40.0, 110.0])
+def test_trials_match_stepped_engine(scenario, speed_kmh):
+    sums = TripSums(trip_profile(scenario, 20.0, speed_kmh))
+    inputs = dict((name, np.full(len(TRIALS), value)) for name, value in UNCERTAIN_INPUTS.items())
+    for name, values in zip(('mass', 'width', 'height', 'length', 'efficiency'), TRIALS.T):
+        inputs[name] = values
+    results = evaluate_trials(sums, inputs)
+
+    for trial, total_fuel, cost, co2 in zip(TRIALS, results['total_fuel'], results['cost'], results['co2']):
+        data = run_simulation(Vehicle(*trial), 20.0, speed_kmh, scenario)
+        assert total_fuel == pytest.approx(data.cumulative_fuel[-1], rel=1e-9)
+        assert cost == pytest.approx(calculate_cost_estimation(data.cumulative_fuel, UNCERTAIN_INPUTS['fuel_price']), rel=1e-9)
+        assert co2 == pytest.approx(calculate_co2_emissions(data.cumulative_fuel), rel=1e-9)
+
+def test_samples_stay_physical():
+    distributions = {
+        'mass': ('normal', 100.0, 200.0),
+        'efficiency': ('uniform', -0.2, 1.5),
+        'rolling_coefficient': ('normal', 0.0, 0.01),
+    }
+    summary = run_monte_carlo(distributions, 1, dict(distance=10.0), trials=20000, seed=3)
+    fuel = summary['samples']['total_fuel']
+    assert np.isfinite(fuel).all() and (fuel > 0).all()
+
+    inputs = sample_inputs(distributions, np.random.default_rng(0), 5000)
+    assert (inputs['mass'] > 0).all()
+    assert ((inputs['efficiency'] > 0) & (inputs['efficiency'] <= 1)).all()
+    assert (inputs['rolling_coefficient'] >= 0).all()
+
+@pytest.mark.parametrize('text', [
+    'mass=fixed:-5', 'mass=normal:1000:-1', 'efficiency=uniform:0.4:0.3',
+    'width=triangular:1:3:2', 'efficiency=fixed:1.5',
+])
+def test_invalid_distributions_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_distribution(text)
+
+def test_distribution_without_valid_values_is_rejected():
+    with pytest.raises(ValueError):
+        run_monte_carlo({'mass': ('uniform', -20.0, -10.0)}, 1, dict(distance=10.0), trials=100)
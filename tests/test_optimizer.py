@@ -0,0 +1,9 @@
+import pytest
+from optimizer import FuelObjective, optimize
+
+def test_frontal_area_with_width_or_height_is_rejected():
+    for names in (['frontal_area', 'width'], ['height', 'frontal_area']):
+        with pytest.raises(ValueError, match="frontal_area"):
+            FuelObjective(1, names)
+    with pytest.raises(ValueError):
+        optimize(1, {'frontal_area': (1.0, 4.0), 'width': (1.5, 2.5)})
@@ -0,0 +1,17 @@
+import pytest
+from parameter_sweep import run_parameter_sweep
+from run_metrics import calculate_total_distance
+from vehicle_engine import Vehicle, run_simulation
+
+def test_sweep_matches_stepped_engine():
+    table = run_parameter_sweep(
+        mass=[900.0, 1600.0], frontal_area=[2.2, 4.0], efficiency=[0.3, 0.4],
+        speed_kmh=[50.0, 120.0], scenario=[1, 2, 3], length=[4.0, 5.0], distance_km=15.0
+    )
+    assert len(table) == 3 * 2 * 2 * 2 * 2 * 2
+    for row in table:
+        vehicle = Vehicle(row['mass'], row['frontal_area'], 1.0, row['length'], row['efficiency'])
+        data = run_simulation(vehicle, row['distance_km'], row['speed_kmh'], int(row['scenario']))
+        assert row['total_fuel'] == pytest.approx(data.cumulative_fuel[-1], rel=1e-9)
+        assert row['max_drag'] == pytest.approx(data.drag.max(), rel=1e-12)
+        assert row['distance'] == pytest.approx(calculate_total_distance(data.speed, data.time), rel=1e-12)
@@ -0,0 +1,18 @@
+import numpy as np
+from result_cache import ResultCache, cached_simulate
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+def test_cached_run_matches_simulation(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    params = dict(DEFAULT_PARAMETERS, distance=10.0)
+    expected = simulate(params, 2)
+
+    first = cached_simulate(params, 2, cache)
+    stored = cached_simulate(params, 2, cache)
+    assert len(cache.entries()) == 1
+    np.testing.assert_array_equal(first.table, expected.table)
+    np.testing.assert_array_equal(stored.table, expected.table)
+
+    other = cached_simulate(dict(params, mass=1500.0), 2, cache)
+    assert len(cache.entries()) == 2
+    np.testing.assert_array_equal(other.table, simulate(dict(params, mass=1500.0), 2).table)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import run_metrics
+
+def naive_windows(values, steps):
+    windows = [values[start:start + steps] for start in range(len(values) - steps + 1)]
+    return (
+        np.array([window.sum() for window in windows]),
+        np.array([window.mean() for window in windows]),
+        np.array([window.max() for window in windows]),
+    )
+
+@pytest.fixture
+def column():
+    return np.random.default_rng(7).normal(size=503)
+
+def test_windows_in_steps_match_slices(column):
+    windows = run_metrics.calculate_rolling_windows(column, [1, 2, 5, 64, 100, 503])
+    for steps, result in windows.items():
+        sums, means, maxima = naive_windows(column, steps)
+        assert result['steps'] == steps
+        np.testing.assert_allclose(result['sum'], sums, atol=1e-9)
+        np.testing.assert_allclose(result['mean'], means, atol=1e-9)
+        np.testing.assert_array_equal(result['max'], maxima)
+
+def test_windows_in_seconds_match_slices(column):
+    time = np.arange(len(column)) * 0.5
+    windows = run_metrics.calculate_rolling_windows(column, [10.0, 30.0], time, seconds=True)
+    for seconds, result in windows.items():
+        steps = int(seconds / 0.5)
+        sums, means, maxima = naive_windows(column, steps)
+        assert result['steps'] == steps
+        np.testing.assert_allclose(result['sum'], sums, atol=1e-9)
+        np.testing.assert_allclose(result['mean'], means, atol=1e-9)
+        np.testing.assert_array_equal(result['max'], maxima)
+
+def test_window_longer_than_run_is_empty(column):
+    result = run_metrics.calculate_rolling_windows(column, [1000])[1000]
+    assert len(result['sum']) == len(result['mean']) == len(result['max']) == 0
+
+def test_peak_period_and_rolling_consumption_match_slices():
+    rng = np.random.default_rng(1)
+    time = np.arange(400.0)
+    fuel = rng.uniform(0.0, 1e-3, len(time))
+    speed = rng.uniform(5.0, 30.0, len(time))
+
+    peak = run_metrics.find_peak_consumption_period(fuel, time, window_seconds=50)
+    sums = np.array([fuel[start:start + 50].sum() for start in range(len(fuel) - 50)])
+    start = int(np.argmax(sums))
+    assert peak['start_time'] == time[start] and peak['end_time'] == time[start + 50]
+    assert peak['consumption'] == pytest.approx(sums[start])
+
+    window_time, fuel_per_100km = run_metrics.calculate_rolling_fuel_consumption(fuel, speed, time, window=20)
+    expected = [fuel[i:i + 20].sum() / speed[i:i + 20].sum() * 100000.0 for i in range(len(fuel) - 20)]
+    np.testing.assert_array_equal(window_time, time[:len(expected)])
+    np.testing.assert_allclose(fuel_per_100km, expected)
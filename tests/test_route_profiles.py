@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pytest
+import route_profiles
+from route_profiles import build_route, load_route, read_route_table, route_cache_path
+
+def write_route(path, text):
+    path.write_text(text)
+    return str(path)
+
+@pytest.mark.parametrize("text, message", [
+    ("speed\n1\n2\n", "exactly one of the columns"),
+    ("time,distance,speed\n0,0,1\n1,1,1\n", "exactly one of the columns"),
+    ("time,grade\n0,1\n1,2\n", "at least one of the columns"),
+    ("time,speed\n0,1\n", "at least two rows"),
+    ("time,speed\n0,1\n2,1\n2,1\n", "strictly increasing"),
+])
+def test_read_route_table_rejects_bad_tables(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        read_route_table(write_route(tmp_path / "route.csv", text))
+
+def test_read_route_table_puts_the_index_first(tmp_path):
+    table = read_route_table(write_route(tmp_path / "route.csv", "elevation, note ,distance\n5,x,0\n10,y,100\n"))
+    assert list(table) == ['distance', 'elevation']
+    np.testing.assert_array_equal(table['distance'], [0.0, 100.0])
+
+def test_time_indexed_route():
+    table = {'time': np.array([10.0, 20.0, 30.0]), 'speed_kmh': np.array([36.0, 36.0, 72.0])}
+    route = build_route("cycle", table)
+    np.testing.assert_allclose(route.cycle_time, [0.0, 10.0, 20.0])
+    np.testing.assert_allclose(route.cycle_distance, [0.0, 100.0, 250.0])
+    assert route.duration == 20.0
+
+    np.testing.assert_allclose(route.speed([0.0, 15.0, 99.0], 5.0), [10.0, 15.0, 20.0])
+    np.testing.assert_allclose(route.distance([5.0, 10.0], 5.0), [50.0, 100.0])
+    np.testing.assert_array_equal(route.slope([0.0, 15.0], 5.0), [0.0, 0.0])
+
+    with pytest.raises(ValueError):
+        build_route("cycle", {'time': table['time'], 'speed': -table['speed_kmh']})
+
+def test_distance_indexed_route():
+    table = {
+        'distance': np.array([0.0, 100.0, 200.0]),
+        'speed': np.array([10.0, 10.0, 10.0]),
+        'elevation': np.array([0.0, 10.0, 10.0]),
+    }
+    route = build_route("hill", table)
+    np.testing.assert_allclose(route.cycle_time, [0.0, 10.0, 20.0])
+    np.testing.assert_allclose(route.terrain_distance, [0.0, 100.0, 200.0])
+    np.testing.assert_allclose(route.terrain_slope, [np.arctan2(10.0, 100.0), 0.0, 0.0])
+    # The slope is looked up by distance covered and held past the last point
+    np.testing.assert_allclose(route.slope([0.0, 9.9, 10.0, 50.0], 5.0), [np.arctan2(10.0, 100.0)] * 2 + [0.0, 0.0])
+
+    with pytest.raises(ValueError, match="positive speeds"):
+        build_route("hill", dict(table, speed=np.array([10.0, 0.0, 10.0])))
+
+def test_terrain_only_route_uses_the_cruise_speed():
+    route = build_route("terrain", {'distance': np.array([0.0, 50.0]), 'slope': np.array([0.1, -0.1])})
+    assert not route.has_cycle and route.duration == 0.0
+    np.testing.assert_array_equal(route.speed([0.0, 100.0], 5.0), [5.0, 5.0])
+    np.testing.assert_array_equal(route.distance([0.0, 100.0], 5.0), [0.0, 500.0])
+    np.testing.assert_array_equal(route.slope([0.0, 9.0, 10.0, 100.0], 5.0), [0.1, 0.1, -0.1, -0.1])
+
+def test_load_route_round_trips_through_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(route_profiles, "loaded_routes", {})
+    path = write_route(tmp_path / "commute.csv", "time,speed,slope\n0,0,0\n10,10,0.05\n20,5,0\n")
+    cache_dir = str(tmp_path / "cache")
+    expected = build_route("commute", read_route_table(path))
+
+    route = load_route(path, cache_dir)
+    assert os.path.isfile(route_cache_path(path, cache_dir))
+    assert load_route(path, cache_dir) is route
+
+    # A new process reads the stored arrays instead of the CSV
+    monkeypatch.setattr(route_profiles, "loaded_routes", {})
+    monkeypatch.setattr(route_profiles, "read_route_table", None)
+    stored = load_route(path, cache_dir)
+    assert stored is not route and stored.name == "commute"
+    assert stored.digest == expected.digest
+    for array, original in zip(stored.arrays(), expected.arrays()):
+        np.testing.assert_array_equal(array, original)
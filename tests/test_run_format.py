@@ -0,0 +1,93 @@
+import mmap
+import os
+import sys
+import numpy as np
+import pytest
+import run_format
+import vehicle_analysis
+from run_format import (
+    RUN_EXTENSION, convert_csv_to_run, is_run_file, iter_run_chunks, load_run, open_run_file, run_file_header,
+    write_run_file
+)
+from simulation_data import SimulationData, save_csv_file
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+@pytest.fixture(scope="module")
+def data():
+    return simulate(dict(DEFAULT_PARAMETERS, distance=5.0), 2)
+
+def mapped_base(array):
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return array.obj if isinstance(array, memoryview) else array
+
+def test_run_file_round_trip(tmp_path, data):
+    path = str(tmp_path / ("run" + RUN_EXTENSION))
+    params = dict(DEFAULT_PARAMETERS, distance=5.0)
+    write_run_file(data, path, params)
+
+    assert is_run_file(path)
+    header = run_file_header(path)
+    assert header['rows'] == data.get_size() and header['params'] == params
+    assert header['data_offset'] % run_format.DATA_ALIGNMENT == 0
+    np.testing.assert_array_equal(open_run_file(path).table, data.table)
+
+def test_run_file_is_memory_mapped(tmp_path, data):
+    path = str(tmp_path / ("run" + RUN_EXTENSION))
+    write_run_file(data, path)
+    run = open_run_file(path)
+    assert isinstance(mapped_base(run.table), mmap.mmap)
+    assert not run.table.flags.writeable
+    # Column attributes are views of the mapped table, not copies
+    assert np.shares_memory(run.speed, run.table)
+    np.testing.assert_array_equal(run.speed, data.speed)
+
+    chunks = list(iter_run_chunks(path, chunk_rows=100))
+    assert [chunk.shape[1] for chunk in chunks[:-1]] == [100] * (len(chunks) - 1)
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=1), data.table)
+
+def test_empty_and_truncated_runs(tmp_path, data):
+    empty = str(tmp_path / "empty.vsr")
+    write_run_file(SimulationData(), empty)
+    assert open_run_file(empty).get_size() == 0
+
+    truncated = str(tmp_path / "truncated.vsr")
+    write_run_file(data, truncated)
+    with open(truncated, "r+b") as file:
+        file.truncate(os.path.getsize(truncated) - 8)
+    with pytest.raises(ValueError, match="truncated"):
+        open_run_file(truncated)
+
+def test_convert_csv_to_run(tmp_path, data):
+    csv_path = str(tmp_path / "vehicle_simulation_scenario_2.csv.gz")
+    save_csv_file(data, csv_path)
+    run_path = convert_csv_to_run(csv_path, params={'mass': 1200.0})
+
+    assert run_path == str(tmp_path / "vehicle_simulation_scenario_2.vsr")
+    assert run_file_header(run_path)['params'] == {'mass': 1200.0}
+    np.testing.assert_array_equal(open_run_file(run_path).table, load_run(csv_path).table)
+
+def test_main_stores_params(tmp_path, data, monkeypatch):
+    csv_path = str(tmp_path / "run.csv")
+    save_csv_file(data, csv_path)
+    monkeypatch.setattr(sys, "argv", ["run_format.py", csv_path, "--param", "mass=1500", "--param", "label=eco"])
+    run_format.main()
+    assert run_file_header(str(tmp_path / "run.vsr"))['params'] == {'mass': 1500.0, 'label': 'eco'}
+
+    monkeypatch.setattr(sys, "argv", ["run_format.py", csv_path, "--param", "mass"])
+    with pytest.raises(SystemExit):
+        run_format.main()
+
+def test_load_csv_file_detects_the_format(tmp_path, data):
+    csv_path = str(tmp_path / "run.csv")
+    save_csv_file(data, csv_path)
+    # Detection reads the magic bytes, not the extension
+    disguised = str(tmp_path / "binary.csv")
+    write_run_file(data, disguised)
+
+    from_csv = vehicle_analysis.load_csv_file(csv_path)
+    from_run = vehicle_analysis.load_csv_file(disguised)
+    assert isinstance(mapped_base(from_run.table), mmap.mmap)
+    assert not isinstance(mapped_base(from_csv.table), mmap.mmap)
+    np.testing.assert_array_equal(from_run.table, data.table)
+    np.testing.assert_allclose(from_csv.table, data.table, rtol=1e-5, atol=1e-9)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import run_metrics
+from simulation_data import COLUMNS, METRIC_DEFINITIONS, SimulationData, derived_metric
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+@pytest.fixture
+def data():
+    return simulate(dict(DEFAULT_PARAMETERS, distance=5.0), 2)
+
+@pytest.fixture
+def counted(monkeypatch):
+    """Count the calls of every registered metric"""
+    calls = dict.fromkeys(METRIC_DEFINITIONS, 0)
+    for name, (function, depends) in list(METRIC_DEFINITIONS.items()):
+        def wrapper(metrics, name=name, function=function):
+            calls[name] += 1
+            return function(metrics)
+        monkeypatch.setitem(METRIC_DEFINITIONS, name, (wrapper, depends))
+    return calls
+
+def test_builtin_metrics_need_no_analysis_import(data):
+    assert set(run_metrics.BUILTIN_METRICS) <= set(METRIC_DEFINITIONS)
+    assert data.metrics['distance'] == pytest.approx(run_metrics.calculate_total_distance(data.speed, data.time))
+    assert data.metrics['distance'] == data.metrics['cumulative_distance'][-1]
+
+def test_metrics_are_computed_once(data, counted):
+    first = data.metrics['fuel_consumption']
+    assert data.metrics['fuel_consumption'] == first
+    assert data.metrics['distance'] == data.metrics['cumulative_distance'][-1]
+    assert counted['fuel_consumption'] == counted['distance'] == counted['cumulative_distance'] == 1
+
+def test_dependents_follow_the_graph(data):
+    assert data.metrics.dependents(['time']) >= {'time', 'cumulative_distance', 'distance', 'fuel_consumption', 'peak_period'}
+    assert 'speed_stats' not in data.metrics.dependents(['time'])
+    assert data.metrics.dependents(['cumulative_fuel']) == {'cumulative_fuel', 'fuel_consumption'}
+
+def test_invalidate_drops_only_dependents(data, counted):
+    for name in ('fuel_consumption', 'speed_stats', 'drag_stats'):
+        data.metrics[name]
+    data.metrics.invalidate('speed')
+    assert set(data.metrics.values) == {'drag_stats'}
+
+    data.metrics['fuel_consumption']
+    assert counted['cumulative_distance'] == counted['distance'] == 2
+    data.metrics.invalidate()
+    assert data.metrics.values == {}
+
+def test_invalidate_sees_changed_columns():
+    table = np.zeros((len(COLUMNS), 3))
+    table[COLUMNS.index('time')] = [0.0, 1.0, 2.0]
+    table[COLUMNS.index('speed')] = 10.0
+    data = SimulationData(table)
+    assert data.metrics['distance'] == 20.0
+    data.speed[:] = 20.0
+    assert data.metrics['distance'] == 20.0
+    data.metrics.invalidate('speed')
+    assert data.metrics['distance'] == 40.0
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        derived_metric('broken', depends=('no_such_column',))(lambda metrics: 0)
+    assert 'broken' not in METRIC_DEFINITIONS
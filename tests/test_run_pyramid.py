@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pytest
+from run_format import write_run_file
+from run_pyramid import (
+    BASE_BUCKET, TOP_BUCKETS, RunPyramid, build_levels, load_pyramid, pyramid_path, save_pyramid
+)
+from simulation_data import COLUMNS, SimulationData
+
+ROWS = 200_003
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(7)
+    table = rng.normal(size=(len(COLUMNS), ROWS))
+    table[COLUMNS.index('time')] = np.arange(ROWS, dtype=np.float64)
+    speed = table[COLUMNS.index('speed')]
+    speed[123_457] = 50.0
+    speed[7] = -50.0
+    return SimulationData(table)
+
+def test_levels_hold_the_min_max_and_mean_of_each_bucket(data):
+    levels = build_levels(data.speed)
+    assert [bucket for bucket, *_ in levels] == [BASE_BUCKET * 2 ** k for k in range(len(levels))]
+    assert len(levels[-1][1]) <= TOP_BUCKETS < len(levels[-2][1])
+    for bucket, low, high, mean in levels:
+        starts = np.arange(0, ROWS, bucket)
+        np.testing.assert_array_equal(low, np.minimum.reduceat(data.speed, starts))
+        np.testing.assert_array_equal(high, np.maximum.reduceat(data.speed, starts))
+        np.testing.assert_allclose(mean, np.add.reduceat(data.speed, starts) / np.diff(np.append(starts, ROWS)))
+
+def test_short_columns_have_no_levels():
+    assert build_levels(np.arange(BASE_BUCKET)) == []
+
+@pytest.mark.parametrize("x_start, x_stop, budget", [(0, ROWS, 400), (100_000, 150_000, 300), (123_000, 124_000, 50)])
+def test_view_keeps_the_envelope(data, x_start, x_stop, budget):
+    x, y = RunPyramid(data).view('speed', x_start, x_stop, budget, scale=2.0)
+    inside = data.speed[x_start:x_stop] * 2.0
+    assert len(x) == len(y) <= 2 * budget + 4
+    assert np.all(np.diff(x) >= 0)
+    # Buckets may reach a little past the range, but never lose its extremes
+    # and only ever show samples of the run
+    assert y.max() >= inside.max() and y.min() <= inside.min()
+    assert np.all(np.isin(y, data.speed * 2.0))
+
+def test_view_without_envelope_returns_bucket_means(data):
+    pyramid = RunPyramid(data)
+    x, y = pyramid.view('speed', 0, ROWS, 400, envelope=False)
+    bucket, _, _, mean = next(level for level in pyramid.column('speed') if len(level[1]) <= 200)
+    np.testing.assert_array_equal(x, data.time[::bucket])
+    np.testing.assert_array_equal(y, mean)
+
+def test_saved_pyramid_round_trips(tmp_path, data):
+    filename = str(tmp_path / "run.vsr")
+    write_run_file(data, filename)
+    save_pyramid(data, filename)
+    assert os.path.isfile(pyramid_path(filename))
+
+    loaded = load_pyramid(filename, data)
+    assert loaded.stored is not None
+    built = RunPyramid(data)
+    for name in ('speed', 'cumulative_fuel'):
+        assert len(loaded.column(name)) == len(built.column(name))
+        for stored_level, built_level in zip(loaded.column(name), built.column(name)):
+            assert stored_level[0] == built_level[0]
+            for stored_array, built_array in zip(stored_level[1:], built_level[1:]):
+                np.testing.assert_array_equal(stored_array, built_array)
+    for stored_view, built_view in zip(loaded.view('speed', 1000, 90_000, 256), built.view('speed', 1000, 90_000, 256)):
+        np.testing.assert_array_equal(stored_view, built_view)
+
+def test_changed_run_rebuilds_its_pyramid(tmp_path, data):
+    filename = str(tmp_path / "run.vsr")
+    write_run_file(data, filename)
+    save_pyramid(data, filename)
+
+    shorter = SimulationData(np.ascontiguousarray(data.table[:, :ROWS // 2]))
+    write_run_file(shorter, filename)
+    pyramid = load_pyramid(filename, shorter)
+    assert pyramid.column('speed')[0][1].size == -(-(ROWS // 2) // BASE_BUCKET)
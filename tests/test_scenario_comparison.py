@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import vehicle_analysis
+from run_format import write_run_file
+from scenario_comparison import compare_runs
+from simulation_data import COLUMNS, SimulationData, save_csv_file
+from vehicle_engine import DEFAULT_PARAMETERS, simulate
+
+def parked_run(rows):
+    table = np.zeros((len(COLUMNS), rows))
+    table[COLUMNS.index('time')] = np.arange(rows)
+    return SimulationData(table)
+
+def test_invalid_runs_are_skipped(capsys):
+    short = simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1)
+    hilly = simulate(dict(DEFAULT_PARAMETERS, distance=3.0), 2)
+    runs = [('short', short), ('single', parked_run(1)), ('parked', parked_run(5)), ('hilly', hilly)]
+
+    comparison = compare_runs(runs)
+    assert comparison.names == ['short', 'hilly']
+    assert [data for _, data in comparison.runs] == [short, hilly]
+    assert np.allclose(comparison.covered, short.metrics['cumulative_distance'][-1])
+    output = capsys.readouterr().out
+    assert "'single' has fewer than two samples" in output
+    assert "'parked' covers no distance" in output
+
+def test_fewer_than_two_valid_runs_raise():
+    run = simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1)
+    with pytest.raises(ValueError):
+        compare_runs([('run', run), ('parked', parked_run(5))], axis='progress')
+
+def test_run_labels_drop_extensions_and_are_unique(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    run = simulate(dict(DEFAULT_PARAMETERS, distance=2.0), 1)
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        write_run_file(run, str(tmp_path / folder / "city_run.vsr"))
+    save_csv_file(run, str(tmp_path / "a" / "highway_run.csv.gz"))
+
+    vehicle_analysis.compare_scenarios(plots=False, paths=["a", "b"])
+    report = capsys.readouterr().out.split("SCENARIO COMPARISON")[1]
+    assert "\ncity run:" in report and "\ncity run (2):" in report and "\nhighway run:" in report
+    assert ".vsr" not in report and ".csv.gz" not in report
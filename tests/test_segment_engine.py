@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from segment_engine import ANALYTIC_RTOL, trip_totals
+from run_metrics import calculate_total_distance
+from vehicle_engine import Vehicle, run_simulation
+
+VEHICLES = [
+    Vehicle(1000.0, 2.0, 2.0, 5.0, 0.4),
+    Vehicle(1800.0, 1.8, 1.5, 4.2, 0.3),
+]
+
+@pytest.mark.parametrize('scenario', [1, 2])
+@pytest.mark.parametrize('speed_kmh', [30.0, 90.0, 140.0])
+@pytest.mark.parametrize('vehicle', VEHICLES)
+def test_closed_form_matches_stepped_engine(vehicle, speed_kmh, scenario):
+    totals = trip_totals(vehicle, 25.0, speed_kmh, scenario, method='analytic')
+    data = run_simulation(vehicle, 25.0, speed_kmh, scenario)
+
+    assert totals['method'] == 'analytic'
+    assert totals['total_fuel'] == pytest.approx(data.cumulative_fuel[-1], rel=ANALYTIC_RTOL)
+    assert totals['distance'] == pytest.approx(calculate_total_distance(data.speed, data.time), rel=ANALYTIC_RTOL)
+    assert totals['max_drag'] == pytest.approx(data.drag.max(), rel=ANALYTIC_RTOL)
+
+def test_scenario_without_closed_form_is_stepped():
+    vehicle = VEHICLES[0]
+    totals = trip_totals(vehicle, 25.0, 90.0, 3)
+    data = run_simulation(vehicle, 25.0, 90.0, 3)
+
+    assert totals['method'] == 'stepped'
+    assert np.isclose(totals['total_fuel'], data.cumulative_fuel[-1], rtol=ANALYTIC_RTOL)
+    with pytest.raises(ValueError):
+        trip_totals(vehicle, 25.0, 90.0, 3, method='analytic')
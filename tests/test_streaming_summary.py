@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import vehicle_analysis as analysis
+from vehicle_engine import DEFAULT_PARAMETERS, SCENARIOS, simulate
+
+def assert_close(streamed, loaded, path=''):
+    if isinstance(loaded, dict):
+        assert streamed.keys() == loaded.keys(), path
+        for key in loaded:
+            assert_close(streamed[key], loaded[key], f"{path}.{key}")
+    else:
+        np.testing.assert_allclose(streamed, loaded, rtol=1e-9, atol=1e-9, err_msg=path)
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+def test_streamed_summary_matches_in_memory(scenario):
+    data = simulate(dict(DEFAULT_PARAMETERS, distance=30.0), scenario)
+    summary = analysis.StreamingSummary()
+    for start in range(0, data.get_size(), 97):
+        summary.update(data.table[:, start:start + 97])
+
+    streamed = analysis.collect_detailed_statistics(summary)
+    loaded = analysis.collect_detailed_statistics(data)
+    assert summary.count == data.get_size()
+    # A summary keeps only the final cumulative fuel
+    assert streamed.pop('cumulative_fuel')[-1] == pytest.approx(loaded.pop('cumulative_fuel')[-1], rel=1e-12)
+    assert_close(streamed, loaded)
+    np.testing.assert_allclose(
+        analysis.calculate_correlation_matrix(summary), analysis.calculate_correlation_matrix(data), atol=1e-9
+    )
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from simulation_data import COLUMNS
+from vehicle_engine import (
+    PROGRESS_INTERVAL, SCENARIOS, Vehicle, iter_simulation, progress_lines, progress_message, run_simulation
+)
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+@pytest.mark.parametrize('chunk_steps', [1, 7, 250, 100000])
+def test_chunked_run_matches_whole_run(scenario, chunk_steps):
+    vehicle = Vehicle(1200.0, 1.9, 1.6, 4.5, 0.35)
+    whole = run_simulation(vehicle, 12.0, 75.0, scenario)
+    chunks = list(iter_simulation(vehicle, 12.0, 75.0, scenario, chunk_steps))
+
+    assert [stop for stop, _, _ in chunks][-1] == whole.get_size()
+    table = np.concatenate([table for _, _, table in chunks], axis=1)
+    assert table.shape == whole.table.shape
+    for index, name in enumerate(COLUMNS):
+        # Only the running sums may differ, by rounding where the chunks join
+        np.testing.assert_allclose(table[index], whole.table[index], rtol=1e-12, atol=1e-12, err_msg=name)
+
+@pytest.mark.parametrize('chunk_steps', [PROGRESS_INTERVAL, 999, 7000])
+def test_progress_lines_match_run_simulation(chunk_steps):
+    vehicle = Vehicle(1200.0, 1.9, 1.6, 4.5, 0.35)
+    chunks = list(iter_simulation(vehicle, 250.0, 75.0, 2, chunk_steps))
+    lines = [line for chunk in chunks for line in progress_lines(*chunk)]
+
+    # 250 km at 75 km/h is 12000 steps: runSimulation prints at i = 0, 5000, 10000 and 11999
+    whole = run_simulation(vehicle, 250.0, 75.0, 2)
+    assert whole.get_size() == 12000
+    assert lines == [
+        f"Progress: {i * 100 // 12000}% | Time: {whole.time[i]:g}s | Speed: {whole.speed[i]:g}m/s"
+        for i in (0, 5000, 10000, 11999)
+    ]
+    assert lines[0].startswith("Progress: 0% | Time: 0s | Speed: ")
+    assert lines[-1].startswith("Progress: 99% | Time: 11999s")
+    if chunk_steps == PROGRESS_INTERVAL:
+        assert [progress_message(*chunk) for chunk in chunks] == lines[:2] + lines[3:]
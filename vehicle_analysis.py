@@ -0,0 +1,933 @@
+"""Statistics, reports and plots for vehicle simulation runs.
+
+Importable as a module and runnable as a command:
+
+    python -m vehicle_analysis [--simulate] [--stats-only | --no-show] ...
+
+matplotlib is imported only by the plotting functions, so --stats-only
+runs never load it.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import math
+import multiprocessing
+import numpy as np
+import os
+import sys
+import vehicle_engine
+from dataset_cache import dataset_cache, load_dataset
+from downsampling import plot_downsampled, plot_scatter_downsampled
+from instrumentation import enable_tracing, span, traced, tracer
+from result_cache import cached_simulate
+from route_profiles import load_route
+from run_format import RUN_EXTENSION, is_run_file, iter_run_chunks
+from run_metrics import (
+    calculate_average_fuel_consumption, calculate_co2_emissions, calculate_cost_estimation, calculate_energy_efficiency,
+    resistance_breakdown_from_totals, rolling_sum
+)
+from scenario_comparison import AXES, PAIRWISE_METRICS, compare_runs
+from simulation_data import (
+    CSV_EXTENSIONS, COLUMNS, STREAM_CHUNK_ROWS, SimulationData, compression_of, csv_stem
+)
+
+MEDIAN_SAMPLE_SIZE = 65536
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+# Compressed run CSVs expand about this much when read
+COMPRESSED_SIZE_FACTOR = 8
+SAVEFIG_DPI = 150
+SCENARIO_FILE_PREFIX = "vehicle_simulation_scenario_"
+
+def print_separator():
+    print("=" * 70)
+
+def print_header(title):
+    print_separator()
+    print(f"  {title}")
+    print_separator()
+
+def find_scenario_files(directory="."):
+    """(filename, scenario name) of every vehicle_simulation_scenario_* run, in scenario order.
+
+    Runs are CSV (plain, .csv.gz or .csv.xz) or binary run files; when a
+    scenario has several, the binary one is used, then the plain CSV.
+    """
+    files = {}
+    for extension in tuple(reversed(CSV_EXTENSIONS)) + (RUN_EXTENSION,):
+        for filename in glob.glob(os.path.join(directory, SCENARIO_FILE_PREFIX + "*" + extension)):
+            suffix = os.path.basename(filename)[len(SCENARIO_FILE_PREFIX):-len(extension)]
+            files[suffix] = os.path.relpath(filename)
+    order = sorted(files, key=lambda suffix: (0, int(suffix), "") if suffix.isdigit() else (1, 0, suffix))
+    return [(files[suffix], f"Scenario_{suffix}") for suffix in order]
+
+@traced
+def load_csv_file(filename):
+    try:
+        data = load_dataset(filename)
+        print(f"Successfully loaded {data.get_size()} data points from {filename}")
+        return data
+    except FileNotFoundError:
+        print(f"ERROR: File {filename} not found.")
+        return None
+    except ValueError as e:
+        print(f"ERROR: Could not parse {filename}: {e}")
+        return None
+
+class StreamingSummary:
+    """Single-pass accumulators over every column of a simulation run.
+
+    Memory use is independent of run length: each column keeps a running
+    count/mean and the full co-moment matrix (merged per chunk with the
+    parallel Welford update), min, max and sum. The median is taken from a fixed-size uniform
+    reservoir sample, so it is exact for runs that fit in the sample and
+    an estimate beyond that.
+    """
+    def __init__(self, window_size=100, sample_size=MEDIAN_SAMPLE_SIZE, seed=0):
+        width = len(COLUMNS)
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.comoment = np.zeros((width, width))
+        self.minimum = np.full(width, np.inf)
+        self.maximum = np.full(width, -np.inf)
+        self.total = np.zeros(width)
+        self.abs_slope_resistance = 0.0
+        self.positive_acc_sum = 0.0
+        self.positive_acc_count = 0
+        self.negative_acc_sum = 0.0
+        self.negative_acc_count = 0
+        self.distance = 0.0
+        self.final_fuel = 0.0
+        self.last_time = None
+        
+        self.sample = np.empty((width, sample_size))
+        self.rng = np.random.default_rng(seed)
+        
+        self.window_size = window_size
+        self.window_fuel = np.empty(0)
+        self.window_time = np.empty(0)
+        self.peak_consumption = 0.0
+        self.peak_start_time = None
+        self.peak_end_time = None
+    
+    def update(self, chunk):
+        size = chunk.shape[1]
+        if size == 0:
+            return
+        index = {name: i for i, name in enumerate(COLUMNS)}
+        
+        chunk_mean = chunk.mean(axis=1)
+        centered = chunk - chunk_mean[:, None]
+        combined = self.count + size
+        delta = chunk_mean - self.mean
+        self.mean += delta * size / combined
+        self.comoment += centered @ centered.T + np.outer(delta, delta) * self.count * size / combined
+        np.minimum(self.minimum, chunk.min(axis=1), out=self.minimum)
+        np.maximum(self.maximum, chunk.max(axis=1), out=self.maximum)
+        self.total += chunk.sum(axis=1)
+        
+        self.abs_slope_resistance += np.abs(chunk[index['slope_resistance']]).sum()
+        acceleration = chunk[index['acceleration']]
+        positive = acceleration[acceleration > 0]
+        negative = acceleration[acceleration < 0]
+        self.positive_acc_sum += positive.sum()
+        self.positive_acc_count += len(positive)
+        self.negative_acc_sum += negative.sum()
+        self.negative_acc_count += len(negative)
+        
+        time = chunk[index['time']]
+        speed = chunk[index['speed']]
+        self.distance += np.dot(speed[1:], np.diff(time))
+        if self.last_time is not None:
+            self.distance += speed[0] * (time[0] - self.last_time)
+        self.last_time = time[-1]
+        self.final_fuel = chunk[index['cumulative_fuel'], -1]
+        
+        self.update_sample(chunk)
+        self.update_peak_window(chunk[index['fuel']], time)
+        self.count = combined
+    
+    def update_sample(self, chunk):
+        sample_size = self.sample.shape[1]
+        positions = np.arange(self.count, self.count + chunk.shape[1])
+        filling = positions < sample_size
+        self.sample[:, positions[filling]] = chunk[:, filling]
+        
+        candidates = np.flatnonzero(~filling)
+        if len(candidates) == 0:
+            return
+        slots = (self.rng.random(len(candidates)) * (positions[candidates] + 1)).astype(np.int64)
+        kept = slots < sample_size
+        self.sample[:, slots[kept]] = chunk[:, candidates[kept]]
+    
+    def update_peak_window(self, fuel, time):
+        window = self.window_size
+        fuel = np.concatenate((self.window_fuel, fuel))
+        time = np.concatenate((self.window_time, time))
+        starts = len(fuel) - window
+        if starts > 0:
+            sums = rolling_sum(fuel, window)[:starts]
+            best = int(np.argmax(sums))
+            if sums[best] > self.peak_consumption:
+                self.peak_consumption = sums[best]
+                self.peak_start_time = time[best]
+                self.peak_end_time = time[best + window]
+            elif self.peak_start_time is None:
+                self.peak_start_time = time[0]
+                self.peak_end_time = time[window]
+        self.window_fuel = fuel[-window:].copy()
+        self.window_time = time[-window:].copy()
+    
+    def column_statistics(self, name):
+        if self.count == 0:
+            return None
+        i = COLUMNS.index(name)
+        filled = min(self.count, self.sample.shape[1])
+        return {
+            'mean': self.mean[i],
+            'median': np.median(self.sample[i, :filled]),
+            'std': np.sqrt(self.comoment[i, i] / (self.count - 1)) if self.count > 1 else 0,
+            'min': self.minimum[i],
+            'max': self.maximum[i],
+            'range': self.maximum[i] - self.minimum[i]
+        }
+    
+    def acceleration_metrics(self):
+        i = COLUMNS.index('acceleration')
+        return {
+            'avg_acceleration': self.positive_acc_sum / self.positive_acc_count if self.positive_acc_count else 0,
+            'avg_deceleration': self.negative_acc_sum / self.negative_acc_count if self.negative_acc_count else 0,
+            'max_acceleration': self.maximum[i] if self.count else 0,
+            'max_deceleration': self.minimum[i] if self.count else 0
+        }
+    
+    def resistance_breakdown(self):
+        return resistance_breakdown_from_totals(
+            self.total[COLUMNS.index('drag')],
+            self.total[COLUMNS.index('rolling_resistance')],
+            self.abs_slope_resistance
+        )
+    
+    def correlation_matrix(self):
+        return correlation_from_comoments(self.comoment, self.mean, self.count)
+    
+    def peak_period(self):
+        if self.peak_start_time is None:
+            return None
+        return {
+            'start_time': self.peak_start_time,
+            'end_time': self.peak_end_time,
+            'consumption': self.peak_consumption
+        }
+
+@traced
+def stream_csv_file(filename, chunk_rows=STREAM_CHUNK_ROWS):
+    summary = StreamingSummary()
+    try:
+        for chunk in iter_run_chunks(filename, chunk_rows):
+            summary.update(chunk)
+        print(f"Successfully streamed {summary.count} data points from {filename}")
+        return summary
+    except FileNotFoundError:
+        print(f"ERROR: File {filename} not found.")
+        return None
+    except ValueError as e:
+        print(f"ERROR: Could not parse {filename}: {e}")
+        return None
+
+def calculate_correlation(x, y):
+    if len(x) != len(y) or len(x) == 0:
+        return 0
+    
+    dx = x - x.mean()
+    dy = y - y.mean()
+    
+    numerator = np.dot(dx, dy)
+    denominator_x = np.dot(dx, dx)
+    denominator_y = np.dot(dy, dy)
+    
+    if denominator_x == 0 or denominator_y == 0:
+        return 0
+    
+    return numerator / (math.sqrt(denominator_x) * math.sqrt(denominator_y))
+
+def correlation_from_comoments(comoment, mean, count):
+    if count == 0:
+        return np.zeros(comoment.shape)
+    spread = np.sqrt(np.maximum(np.diag(comoment), 0.0) / count)
+    # Treat columns whose spread is only accumulated rounding error as constant
+    constant = spread <= 1e-9 * np.abs(mean)
+    scale = np.where(constant, 1.0, np.sqrt(np.maximum(np.diag(comoment), 0.0)))
+    matrix = comoment / np.outer(scale, scale)
+    matrix[constant, :] = 0
+    matrix[:, constant] = 0
+    return np.clip(matrix, -1.0, 1.0)
+
+def rank_rows(table):
+    ranks = np.empty(table.shape)
+    for i, values in enumerate(table):
+        order = np.argsort(values, kind='mergesort')
+        ordered = values[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], len(values)]
+        ranks[i, order] = np.repeat((starts + ends - 1) / 2.0, ends - starts)
+    return ranks
+
+@traced
+def calculate_correlation_matrix(data, method='pearson'):
+    """Correlation between every pair of COLUMNS, as a 13 x 13 array.
+
+    `method` is 'pearson' or 'spearman' (Pearson on average ranks). A
+    StreamingSummary supports Pearson only, from its running co-moments.
+    """
+    if isinstance(data, StreamingSummary):
+        if method != 'pearson':
+            raise ValueError("Streaming summaries only support Pearson correlation")
+        return data.correlation_matrix()
+    if method == 'spearman':
+        table = rank_rows(data.table)
+    elif method == 'pearson':
+        table = data.table
+    else:
+        raise ValueError(f"Unknown correlation method: {method}")
+    mean = table.mean(axis=1)
+    centered = table - mean[:, None]
+    return correlation_from_comoments(centered @ centered.T, mean, table.shape[1])
+
+def correlation_between(matrix, x, y):
+    return matrix[COLUMNS.index(x), COLUMNS.index(y)]
+
+def collect_summary_metrics(data):
+    if isinstance(data, StreamingSummary):
+        return {
+            'distance': data.distance,
+            'cumulative_fuel': np.array([data.final_fuel]),
+            'speed_stats': data.column_statistics('speed')
+        }
+    return {
+        'distance': data.metrics['distance'],
+        'cumulative_fuel': data.cumulative_fuel,
+        'speed_stats': data.metrics['speed_stats']
+    }
+
+def collect_detailed_statistics(data):
+    metrics = collect_summary_metrics(data)
+    if isinstance(data, StreamingSummary):
+        metrics.update({
+            'acc_metrics': data.acceleration_metrics(),
+            'drag_stats': data.column_statistics('drag'),
+            'reynolds_stats': data.column_statistics('reynolds'),
+            'resistance_breakdown': data.resistance_breakdown(),
+            'altitude_stats': data.column_statistics('altitude'),
+            'peak_period': data.peak_period()
+        })
+        return metrics
+    for name in ('acc_metrics', 'drag_stats', 'reynolds_stats', 'resistance_breakdown', 'altitude_stats', 'peak_period'):
+        metrics[name] = data.metrics[name]
+    return metrics
+
+@traced
+def print_detailed_statistics(data):
+    print_header("DETAILED STATISTICAL ANALYSIS")
+    
+    metrics = collect_detailed_statistics(data)
+    distance = metrics['distance']
+    cumulative_fuel = metrics['cumulative_fuel']
+    
+    print(f"\nDistance & Fuel Metrics:")
+    print(f"  Total Distance: {distance / 1000:.3f} km")
+    print(f"  Total Fuel Used: {cumulative_fuel[-1]:.3f} L")
+    print(f"  Fuel Consumption: {calculate_average_fuel_consumption(cumulative_fuel, distance):.3f} L/100km")
+    print(f"  Energy Efficiency: {calculate_energy_efficiency(cumulative_fuel, distance):.3f} km/MJ")
+    print(f"  Estimated Cost: ${calculate_cost_estimation(cumulative_fuel):.2f}")
+    print(f"  CO2 Emissions: {calculate_co2_emissions(cumulative_fuel):.3f} kg")
+    
+    speed_stats = metrics['speed_stats']
+    print(f"\nSpeed Statistics (m/s):")
+    print(f"  Mean: {speed_stats['mean']:.3f}")
+    print(f"  Median: {speed_stats['median']:.3f}")
+    print(f"  Std Dev: {speed_stats['std']:.3f}")
+    print(f"  Min: {speed_stats['min']:.3f}")
+    print(f"  Max: {speed_stats['max']:.3f}")
+    
+    acc_metrics = metrics['acc_metrics']
+    print(f"\nAcceleration Metrics (m/s²):")
+    print(f"  Avg Acceleration: {acc_metrics['avg_acceleration']:.3f}")
+    print(f"  Avg Deceleration: {acc_metrics['avg_deceleration']:.3f}")
+    print(f"  Max Acceleration: {acc_metrics['max_acceleration']:.3f}")
+    print(f"  Max Deceleration: {acc_metrics['max_deceleration']:.3f}")
+    
+    drag_stats = metrics['drag_stats']
+    print(f"\nAerodynamic Drag Statistics (N):")
+    print(f"  Mean: {drag_stats['mean']:.3f}")
+    print(f"  Max: {drag_stats['max']:.3f}")
+    print(f"  Std Dev: {drag_stats['std']:.3f}")
+    
+    reynolds_stats = metrics['reynolds_stats']
+    print(f"\nReynolds Number Statistics:")
+    print(f"  Mean: {reynolds_stats['mean']:.0f}")
+    print(f"  Min: {reynolds_stats['min']:.0f}")
+    print(f"  Max: {reynolds_stats['max']:.0f}")
+    
+    resistance_breakdown = metrics['resistance_breakdown']
+    if resistance_breakdown:
+        print(f"\nResistance Force Breakdown:")
+        print(f"  Aerodynamic Drag: {resistance_breakdown['drag_percentage']:.1f}%")
+        print(f"  Rolling Resistance: {resistance_breakdown['rolling_percentage']:.1f}%")
+        print(f"  Slope Resistance: {resistance_breakdown['slope_percentage']:.1f}%")
+    
+    altitude_stats = metrics['altitude_stats']
+    print(f"\nAltitude Profile (m):")
+    print(f"  Max Elevation: {altitude_stats['max']:.2f}")
+    print(f"  Min Elevation: {altitude_stats['min']:.2f}")
+    print(f"  Elevation Change: {altitude_stats['range']:.2f}")
+    
+    peak_period = metrics['peak_period']
+    if peak_period:
+        print(f"\nPeak Consumption Period:")
+        print(f"  Time Range: {peak_period['start_time']:.0f}s - {peak_period['end_time']:.0f}s")
+        print(f"  Consumption: {peak_period['consumption']:.5f} L")
+    
+    print_separator()
+
+@traced
+def print_correlation_analysis(data, matrix=None):
+    print_header("CORRELATION ANALYSIS")
+    
+    if matrix is None:
+        matrix = calculate_correlation_matrix(data)
+    corr_speed_fuel = correlation_between(matrix, 'speed', 'fuel')
+    corr_speed_drag = correlation_between(matrix, 'speed', 'drag')
+    corr_reynolds_cd = correlation_between(matrix, 'reynolds', 'cd')
+    corr_slope_fuel = correlation_between(matrix, 'slope', 'fuel')
+    
+    print(f"\nCorrelation Coefficients:")
+    print(f"  Speed vs Fuel Consumption: {corr_speed_fuel:.3f}")
+    print(f"  Speed vs Drag Force: {corr_speed_drag:.3f}")
+    print(f"  Reynolds Number vs Cd: {corr_reynolds_cd:.3f}")
+    print(f"  Slope vs Fuel Consumption: {corr_slope_fuel:.3f}")
+    
+    print(f"\nInterpretation:")
+    if abs(corr_speed_fuel) > 0.7:
+        print(f"  Strong correlation between speed and fuel consumption")
+    if abs(corr_speed_drag) > 0.9:
+        print(f"  Very strong correlation between speed and drag (expected)")
+    if abs(corr_slope_fuel) > 0.5:
+        print(f"  Moderate correlation between terrain slope and fuel use")
+    
+    print_separator()
+
+@traced
+def plot_comprehensive_analysis(data, scenario_name, full_resolution=False):
+    import matplotlib.pyplot as plt
+    from matplotlib.gridspec import GridSpec
+    
+    plot_options = {'full_resolution': full_resolution, 'dpi': SAVEFIG_DPI}
+    fig = plt.figure(figsize=(16, 12))
+    gs = GridSpec(4, 3, figure=fig, hspace=0.3, wspace=0.3)
+    
+    ax1 = fig.add_subplot(gs[0, 0])
+    plot_downsampled(ax1, data.time, data.speed, 'b-', linewidth=1, **plot_options)
+    ax1.set_xlabel("Time (s)")
+    ax1.set_ylabel("Speed (m/s)")
+    ax1.set_title("Speed Profile")
+    ax1.grid(True, alpha=0.3)
+    
+    ax2 = fig.add_subplot(gs[0, 1])
+    plot_downsampled(ax2, data.time, data.cumulative_fuel, 'r-', linewidth=1, **plot_options)
+    ax2.set_xlabel("Time (s)")
+    ax2.set_ylabel("Cumulative Fuel (L)")
+    ax2.set_title("Cumulative Fuel Consumption")
+    ax2.grid(True, alpha=0.3)
+    
+    ax3 = fig.add_subplot(gs[0, 2])
+    plot_downsampled(ax3, data.time, data.drag, 'g-', linewidth=1, label='Aerodynamic', **plot_options)
+    plot_downsampled(ax3, data.time, data.rolling_resistance, 'orange', linewidth=1, label='Rolling', **plot_options)
+    plot_downsampled(ax3, data.time, np.abs(data.slope_resistance), 'purple', linewidth=1, label='Slope', **plot_options)
+    ax3.set_xlabel("Time (s)")
+    ax3.set_ylabel("Force (N)")
+    ax3.set_title("Resistance Forces")
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+    
+    ax4 = fig.add_subplot(gs[1, 0])
+    plot_downsampled(ax4, data.time, data.acceleration, 'b-', linewidth=1, **plot_options)
+    ax4.axhline(y=0, color='k', linestyle='--', alpha=0.3)
+    ax4.set_xlabel("Time (s)")
+    ax4.set_ylabel("Acceleration (m/s²)")
+    ax4.set_title("Acceleration Profile")
+    ax4.grid(True, alpha=0.3)
+    
+    ax5 = fig.add_subplot(gs[1, 1])
+    plot_scatter_downsampled(ax5, data.reynolds, data.cd, 'r.', markersize=1, **plot_options)
+    ax5.set_xlabel("Reynolds Number")
+    ax5.set_ylabel("Drag Coefficient")
+    ax5.set_title("Cd vs Reynolds Number")
+    ax5.grid(True, alpha=0.3)
+    
+    ax6 = fig.add_subplot(gs[1, 2])
+    plot_downsampled(ax6, data.time, data.altitude, 'brown', linewidth=1, **plot_options)
+    ax6.set_xlabel("Time (s)")
+    ax6.set_ylabel("Altitude (m)")
+    ax6.set_title("Altitude Profile")
+    ax6.grid(True, alpha=0.3)
+    
+    ax7 = fig.add_subplot(gs[2, 0])
+    ax7.hist(data.speed, bins=30, color='blue', alpha=0.7, edgecolor='black')
+    ax7.set_xlabel("Speed (m/s)")
+    ax7.set_ylabel("Frequency")
+    ax7.set_title("Speed Distribution")
+    ax7.grid(True, alpha=0.3)
+    
+    ax8 = fig.add_subplot(gs[2, 1])
+    plot_scatter_downsampled(ax8, data.speed, data.fuel, 'g.', markersize=1, **plot_options)
+    ax8.set_xlabel("Speed (m/s)")
+    ax8.set_ylabel("Fuel per Step (L)")
+    ax8.set_title("Fuel Consumption vs Speed")
+    ax8.grid(True, alpha=0.3)
+    
+    ax9 = fig.add_subplot(gs[2, 2])
+    ax9.hist(data.reynolds, bins=30, color='red', alpha=0.7, edgecolor='black')
+    ax9.set_xlabel("Reynolds Number")
+    ax9.set_ylabel("Frequency")
+    ax9.set_title("Reynolds Number Distribution")
+    ax9.grid(True, alpha=0.3)
+    
+    ax10 = fig.add_subplot(gs[3, 0])
+    plot_downsampled(ax10, data.time, data.total_resistance, 'purple', linewidth=1, **plot_options)
+    ax10.set_xlabel("Time (s)")
+    ax10.set_ylabel("Total Resistance (N)")
+    ax10.set_title("Total Resistance Force")
+    ax10.grid(True, alpha=0.3)
+    
+    ax11 = fig.add_subplot(gs[3, 1])
+    resistance_breakdown = data.metrics['resistance_breakdown']
+    if resistance_breakdown:
+        labels = ['Aerodynamic', 'Rolling', 'Slope']
+        sizes = [
+            resistance_breakdown['drag_percentage'],
+            resistance_breakdown['rolling_percentage'],
+            resistance_breakdown['slope_percentage']
+        ]
+        colors = ['#ff9999', '#66b3ff', '#99ff99']
+        ax11.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        ax11.set_title("Resistance Force Breakdown")
+    
+    ax12 = fig.add_subplot(gs[3, 2])
+    window_start, fuel_per_100km = data.metrics['rolling_fuel_consumption']
+    
+    if len(fuel_per_100km):
+        plot_downsampled(ax12, window_start, fuel_per_100km, 'b-', linewidth=1, **plot_options)
+        ax12.set_xlabel("Window Start Time (s)")
+        ax12.set_ylabel("L/100km")
+        ax12.set_title("Rolling Fuel Consumption")
+        ax12.grid(True, alpha=0.3)
+    
+    fig.suptitle(f"Comprehensive Analysis - {scenario_name}", fontsize=16, fontweight='bold')
+    with span("savefig", file=f"analysis_{scenario_name}.png"):
+        plt.savefig(f"analysis_{scenario_name}.png", dpi=SAVEFIG_DPI, bbox_inches='tight')
+    print(f"Comprehensive plot saved as: analysis_{scenario_name}.png")
+
+# Beyond this many runs the comparison figure has no legend; bar colours identify the runs
+COMPARISON_LEGEND_RUNS = 12
+
+def run_colors(count):
+    """One colour per run: tab10 for a few runs, evenly spaced viridis for many"""
+    import matplotlib.pyplot as plt
+    if count <= 10:
+        return plt.get_cmap('tab10')(np.arange(count))
+    return plt.get_cmap('viridis')(np.linspace(0.0, 1.0, count))
+
+def plot_run_lines(ax, grid, values, colors):
+    """All runs on one axes as a single LineCollection"""
+    from matplotlib.collections import LineCollection
+    segments = np.stack((np.broadcast_to(grid, values.shape), values), axis=-1)
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=1))
+    ax.autoscale_view()
+
+@traced
+def plot_scenario_comparison(comparison):
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+    
+    fig, axes = plt.subplots(2, 3, figsize=(20, 10))
+    colors = run_colors(len(comparison))
+    grid = comparison.grid / 1000.0 if comparison.axis == 'distance' else comparison.grid * 100.0
+    xlabel = "Distance (km)" if comparison.axis == 'distance' else "Progress (%)"
+    fuel = comparison.column('cumulative_fuel') - comparison.column('cumulative_fuel')[:, :1]
+    
+    panels = [
+        (axes[0, 0], comparison.column('speed') * 3.6, "Speed (km/h)", "Speed Comparison"),
+        (axes[0, 1], fuel, "Cumulative Fuel (L)", "Fuel Consumption Comparison"),
+        (axes[0, 2], fuel - np.median(fuel, axis=0), "Fuel Gap (L)", "Fuel Gap to Median Run"),
+        (axes[1, 0], comparison.column('drag'), "Drag Force (N)", "Drag Force Comparison"),
+        (axes[1, 1], comparison.aligned_altitude(), "Altitude Change (m)", "Start-Aligned Altitude"),
+    ]
+    for ax, values, ylabel, title in panels:
+        plot_run_lines(ax, grid, values, colors)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        ax.grid(True, alpha=0.3)
+    if len(comparison) <= COMPARISON_LEGEND_RUNS:
+        handles = [Line2D([], [], color=color) for color in colors]
+        axes[0, 0].legend(handles, comparison.names)
+    
+    positions = np.arange(len(comparison))
+    axes[1, 2].barh(positions, [total_fuel for total_fuel, _ in comparison.totals], color=colors)
+    axes[1, 2].set_yticks(positions, comparison.names, fontsize=8 if len(comparison) > COMPARISON_LEGEND_RUNS else None)
+    axes[1, 2].invert_yaxis()
+    axes[1, 2].set_xlabel("Total Fuel (L)")
+    axes[1, 2].set_title("Total Fuel Comparison")
+    axes[1, 2].grid(True, alpha=0.3, axis='x')
+    
+    plt.tight_layout()
+    with span("savefig", file="scenario_comparison.png"):
+        plt.savefig("scenario_comparison.png", dpi=SAVEFIG_DPI, bbox_inches='tight')
+    print("Scenario comparison saved as: scenario_comparison.png")
+    
+    gaps = comparison.pairwise()['fuel_gap_per_100km']
+    fig, ax = plt.subplots(figsize=(max(6, 0.4 * len(comparison) + 3), max(5, 0.4 * len(comparison) + 2)))
+    limit = max(np.abs(gaps).max(), 1e-9)
+    # One quad per pair; imshow would resample a full-figure image at SAVEFIG_DPI
+    image = ax.pcolormesh(gaps, cmap='RdBu_r', vmin=-limit, vmax=limit)
+    ax.invert_yaxis()
+    ax.set_xticks(positions + 0.5, comparison.names, rotation=90, fontsize=8)
+    ax.set_yticks(positions + 0.5, comparison.names, fontsize=8)
+    if len(comparison) <= COMPARISON_LEGEND_RUNS:
+        for i, j in np.ndindex(gaps.shape):
+            ax.text(j + 0.5, i + 0.5, f"{gaps[i, j]:+.2f}", ha='center', va='center', fontsize=8)
+    fig.colorbar(image, ax=ax, label="Column minus row (L/100km)")
+    ax.set_title("Pairwise Fuel Gap")
+    plt.tight_layout()
+    with span("savefig", file="scenario_comparison_pairwise.png"):
+        plt.savefig("scenario_comparison_pairwise.png", dpi=SAVEFIG_DPI, bbox_inches='tight')
+    print("Pairwise fuel gap saved as: scenario_comparison_pairwise.png")
+
+def export_pairwise_comparison(comparison, filename="scenario_comparison_pairwise.csv"):
+    with open(filename, 'w') as f:
+        f.write("run,other," + ",".join(PAIRWISE_METRICS) + "\n")
+        for run, other, *values in comparison.pairwise_rows():
+            f.write(f"{run},{other}," + ",".join(f"{value:.6f}" for value in values) + "\n")
+    print(f"Pairwise comparison exported to: {filename}")
+
+@traced
+def run_label(filename):
+    """File name of a run without its directory or its CSV or binary run extension"""
+    name = os.path.basename(csv_stem(filename))
+    return name[:-len(RUN_EXTENSION)] if name.endswith(RUN_EXTENSION) else name
+
+def unique_labels(names):
+    """`names` with " (2)", " (3)", ... appended to repeats"""
+    labels = []
+    for name in names:
+        label, count = name, 1
+        while label in labels:
+            count += 1
+            label = f"{name} ({count})"
+        labels.append(label)
+    return labels
+
+def compare_scenarios(runs=None, plots=True, axis='distance', paths=None):
+    """Compare (name, SimulationData) runs, the runs in `paths`, or the scenario files here"""
+    if runs is None:
+        if paths is None:
+            files = find_scenario_files()
+        else:
+            from batch_analysis import find_run_files
+            files = [(filename, run_label(filename)) for filename in find_run_files(paths)]
+        runs = []
+        for filename, scenario_name in files:
+            data = load_csv_file(filename)
+            if data:
+                runs.append((scenario_name, data))
+    names = unique_labels([scenario_name.replace('_', ' ') for scenario_name, _ in runs])
+    runs = [(scenario_name, data) for scenario_name, (_, data) in zip(names, runs)]
+    
+    if len(runs) < 2:
+        print("Not enough scenarios to compare. Need at least 2 CSV files.")
+        return
+    
+    print_header("SCENARIO COMPARISON")
+    
+    try:
+        comparison = compare_runs(runs, axis)
+    except ValueError as e:
+        print(f"ERROR: Could not compare runs: {e}")
+        return
+    
+    if plots:
+        plot_scenario_comparison(comparison)
+    
+    print("\nComparative Statistics:")
+    for scenario_name, data in comparison.runs:
+        print(f"\n{scenario_name}:")
+        print(f"  Total Fuel: {data.cumulative_fuel[-1]:.3f} L")
+        print(f"  Fuel per 100km: {data.metrics['fuel_consumption']:.3f} L/100km")
+        print(f"  Distance: {data.metrics['distance'] / 1000:.3f} km")
+        print(f"  Avg Speed: {data.metrics['speed_stats']['mean']:.3f} m/s")
+    
+    grid_label = "common distance" if axis == 'distance' else "normalized progress"
+    best = int(np.argmin(comparison.fuel_per_100km()))
+    matrices = comparison.pairwise()
+    print(f"\nAgainst the most efficient run ({comparison.names[best]}) on the {grid_label} grid:")
+    print(f"  {'Run':24s} {'Fuel gap (L/100km)':>19s} {'Drag delta (N)':>15s} {'Altitude RMS (m)':>17s}")
+    for i, name in enumerate(comparison.names):
+        print(f"  {name[:24]:24s} {matrices['fuel_gap_per_100km'][best, i]:+19.3f} "
+              f"{matrices['drag_delta'][best, i]:+15.3f} {matrices['altitude_rms'][best, i]:17.3f}")
+    export_pairwise_comparison(comparison)
+    
+    print_separator()
+
+@traced
+def export_summary_report(data, scenario_name):
+    filename = f"summary_report_{scenario_name}.txt"
+    with open(filename, 'w') as f:
+        f.write("=" * 70 + "\n")
+        f.write(f"SIMULATION SUMMARY REPORT - {scenario_name}\n")
+        f.write("=" * 70 + "\n\n")
+        
+        metrics = collect_summary_metrics(data)
+        distance = metrics['distance']
+        cumulative_fuel = metrics['cumulative_fuel']
+        f.write(f"Total Distance: {distance / 1000:.3f} km\n")
+        f.write(f"Total Fuel Used: {cumulative_fuel[-1]:.3f} L\n")
+        f.write(f"Fuel Consumption: {calculate_average_fuel_consumption(cumulative_fuel, distance):.3f} L/100km\n")
+        f.write(f"Estimated Cost: ${calculate_cost_estimation(cumulative_fuel):.2f}\n")
+        f.write(f"CO2 Emissions: {calculate_co2_emissions(cumulative_fuel):.3f} kg\n\n")
+        
+        speed_stats = metrics['speed_stats']
+        f.write(f"Average Speed: {speed_stats['mean']:.3f} m/s\n")
+        f.write(f"Maximum Speed: {speed_stats['max']:.3f} m/s\n\n")
+        
+        f.write("Analysis completed successfully.\n")
+    
+    print(f"Summary report exported to: {filename}")
+
+@traced
+def export_correlation_matrix(matrix, scenario_name):
+    filename = f"correlation_matrix_{scenario_name}.csv"
+    with open(filename, 'w') as f:
+        f.write("column," + ",".join(COLUMNS) + "\n")
+        for name, row in zip(COLUMNS, matrix):
+            f.write(name + "," + ",".join(f"{value:.6f}" for value in row) + "\n")
+    print(f"Correlation matrix exported to: {filename}")
+
+def analyze_dataset(data, scenario_name, full_resolution=False, plots=True):
+    correlation_matrix = calculate_correlation_matrix(data)
+    print_detailed_statistics(data)
+    print_correlation_analysis(data, correlation_matrix)
+    export_correlation_matrix(correlation_matrix, scenario_name)
+    if plots:
+        plot_comprehensive_analysis(data, scenario_name, full_resolution)
+    export_summary_report(data, scenario_name)
+
+@traced
+def simulate_default_scenarios(route_files=()):
+    runs = []
+    for scenario in vehicle_engine.SCENARIOS:
+        data = cached_simulate(vehicle_engine.DEFAULT_PARAMETERS, scenario)
+        print(f"Simulated {data.get_size()} data points for scenario {scenario}")
+        runs.append((f"Scenario_{scenario}", data))
+    for filename in route_files:
+        route = load_route(filename)
+        data = cached_simulate(vehicle_engine.DEFAULT_PARAMETERS, route)
+        print(f"Simulated {data.get_size()} data points for route {route.name}")
+        runs.append((f"Route_{route.name}", data))
+    return runs
+
+def print_processing_banner(name):
+    print(f"\n{'=' * 70}")
+    print(f"Processing: {name}")
+    print('=' * 70)
+
+@traced
+def process_scenario(source, scenario_name, stream=False, full_resolution=False, plots=True):
+    """Analyze one run, given as a CSV path or SimulationData; returns True if it was streamed"""
+    if isinstance(source, SimulationData):
+        print_processing_banner(scenario_name)
+        analyze_dataset(source, scenario_name, full_resolution, plots)
+        return False
+    
+    print_processing_banner(source)
+    
+    size = os.path.getsize(source) * (COMPRESSED_SIZE_FACTOR if compression_of(source) else 1)
+    if stream or size > STREAMING_THRESHOLD_BYTES:
+        data = stream_csv_file(source)
+        if data is None:
+            return True
+        
+        correlation_matrix = calculate_correlation_matrix(data)
+        print_detailed_statistics(data)
+        print_correlation_analysis(data, correlation_matrix)
+        export_correlation_matrix(correlation_matrix, scenario_name)
+        print("Streaming mode: plots skipped.")
+        export_summary_report(data, scenario_name)
+        return True
+    
+    data = load_csv_file(source)
+    if data is None:
+        return False
+    
+    analyze_dataset(data, scenario_name, full_resolution, plots)
+    return False
+
+def init_scenario_worker(trace=False, plots=True):
+    if plots:
+        import matplotlib
+        matplotlib.use('Agg')
+    tracer.take_spans()  # drop spans inherited from the parent on fork
+    if trace:
+        enable_tracing()
+
+def process_scenario_captured(job):
+    """(output, streamed, spans, table) of one job; `table` is the parsed CSV, if any, for the parent's cache"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        streamed = process_scenario(*job)
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+    source = job[0]
+    table = None
+    if not streamed and not isinstance(source, SimulationData) and not is_run_file(source):
+        data = dataset_cache.cached(source)
+        table = data.table if data is not None else None
+    return output.getvalue(), streamed, tracer.take_spans(), table
+
+def process_scenarios(jobs, workers=1):
+    """Run process_scenario for each (source, name, stream, full_resolution, plots) job.
+
+    With more than one worker the jobs run in a process pool that renders
+    with Agg; each worker's console output is captured and printed here in
+    job order, so the report reads the same as a sequential run. Spans
+    recorded in the workers are merged into the parent's trace, and the
+    CSVs they parsed are put into the parent's dataset cache so that
+    compare_scenarios does not parse them again. Their figures are saved
+    but never exist in this process, so pyplot cannot show them; see
+    run_analysis.
+    """
+    streamed = False
+    if workers > 1 and len(jobs) > 1:
+        plots = any(job[4] for job in jobs)
+        with multiprocessing.Pool(
+            min(workers, len(jobs)), initializer=init_scenario_worker, initargs=(tracer.enabled, plots)
+        ) as pool:
+            for job, (output, job_streamed, spans, table) in zip(jobs, pool.imap(process_scenario_captured, jobs)):
+                print(output, end='')
+                tracer.add_spans(spans)
+                if table is not None:
+                    dataset_cache.put(job[0], SimulationData(table))
+                streamed = streamed or job_streamed
+    else:
+        for job in jobs:
+            streamed = process_scenario(*job) or streamed
+    return streamed
+
+def run_analysis(stream=False, simulate=False, workers=1, full_resolution=False, plots=True, show=True,
+                 route_files=(), compare_axis='distance'):
+    print_header("ADVANCED VEHICLE SIMULATION ANALYSIS")
+    
+    if plots and show and workers > 1:
+        # Figures drawn in worker processes cannot be shown from this one
+        print("Showing plots: analyzing scenarios in this process (use --no-show to run them in parallel).")
+        workers = 1
+    
+    scenario_files = find_scenario_files()
+    
+    if simulate or not scenario_files:
+        if not simulate:
+            print("No simulation CSV files found.")
+        print("Running the built-in simulation engine with default parameters.")
+        runs = simulate_default_scenarios(route_files)
+        jobs = [(data, scenario_name, False, full_resolution, plots) for scenario_name, data in runs]
+        process_scenarios(jobs, workers)
+        compare_scenarios(runs, plots, compare_axis)
+    else:
+        print(f"\nFound {len(scenario_files)} scenario file(s)")
+        jobs = [(filename, scenario_name, stream, full_resolution, plots) for filename, scenario_name in scenario_files]
+        streamed = process_scenarios(jobs, workers)
+        if len(scenario_files) > 1 and not streamed:
+            compare_scenarios(plots=plots, axis=compare_axis)
+    
+    if plots and show:
+        import matplotlib.pyplot as plt
+        plt.show()
+    
+    print_header("ANALYSIS COMPLETE")
+    print("All plots and reports have been generated." if plots else "All reports have been generated.")
+    print("Check your working directory for output files.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze vehicle simulation CSV output")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="read CSV files in chunks with constant memory (statistics and summary report only)"
+    )
+    parser.add_argument(
+        "--simulate", action="store_true",
+        help="run the three built-in scenarios in-process instead of reading CSV files"
+    )
+    parser.add_argument(
+        "--route", nargs='+', default=[], metavar="FILE",
+        help="with --simulate, also run these drive cycle / terrain route files"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes for per-scenario analysis (0 = one per CPU core); "
+             "runs sequentially unless --no-show or --stats-only is given"
+    )
+    parser.add_argument(
+        "--full-resolution", action="store_true",
+        help="plot every sample instead of downsampling long series to the figure width"
+    )
+    parser.add_argument(
+        "--batch", nargs='+', metavar="PATH",
+        help="write one consolidated metrics table for every run in these files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "--batch-output", default="batch_metrics.csv", metavar="FILE",
+        help="metrics table written by --batch (runs already in it and unchanged are not re-read)"
+    )
+    parser.add_argument(
+        "--compare", nargs='+', metavar="PATH",
+        help="compare every run in these files, directories or glob patterns on a common grid"
+    )
+    parser.add_argument(
+        "--compare-axis", choices=AXES, default='distance',
+        help="grid the runs are compared on: distance travelled or normalized progress (default: distance)"
+    )
+    parser.add_argument(
+        "--trace", metavar="FILE",
+        help="record per-stage timing and memory spans and write them to FILE as a Chrome trace"
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "--stats-only", action="store_true",
+        help="print statistics and write the text reports without importing matplotlib or plotting"
+    )
+    output.add_argument(
+        "--no-show", action="store_true",
+        help="save the figures but do not open the interactive plot windows"
+    )
+    args = parser.parse_args(argv)
+    if args.trace:
+        enable_tracing(args.trace)
+    if args.batch:
+        from batch_analysis import run_batch
+        run_batch(args.batch, args.batch_output, args.jobs or os.cpu_count())
+        return
+    if args.compare:
+        compare_scenarios(plots=not args.stats_only, axis=args.compare_axis, paths=args.compare)
+        if not args.stats_only and not args.no_show:
+            import matplotlib.pyplot as plt
+            plt.show()
+        return
+    run_analysis(
+        stream=args.stream, simulate=args.simulate,
+        workers=args.jobs or os.cpu_count(), full_resolution=args.full_resolution,
+        plots=not args.stats_only, show=not args.no_show, route_files=args.route,
+        compare_axis=args.compare_axis
+    )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,11 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
 import os
-import csv
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import queue
+import threading
+import time
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
+import vehicle_engine
+from simulation_data import COLUMNS, SimulationData, save_csv_file
+from dataset_cache import dataset_cache, load_dataset
+from instrumentation import traced
+from result_cache import result_cache
+from downsampling import axes_point_budget, downsample, plot_downsampled
+from route_profiles import find_routes, load_route, route_name
+from run_pyramid import RunPyramid, load_pyramid, save_pyramid
+
+PROGRESS_POLL_MS = 100
+
+# Live graphs are redrawn at most this often while a run is in progress
+LIVE_FRAME_SECONDS = 0.25
+
+# (tab name, column, scale, y label, title, colour) of the live graph tabs
+LIVE_GRAPH_TABS = [
+    ("Speed Profile", 'speed', 3.6, "Speed (km/h)", "Speed vs Time", 'blue'),
+    ("Drag Force", 'drag', 1.0, "Drag Force (N)", "Aerodynamic Drag vs Time", 'red'),
+    ("Fuel Consumption", 'cumulative_fuel', 1.0, "Cumulative Fuel (L)", "Fuel Consumption vs Time", 'green'),
+]
 
 class VehicleSimulatorGUI:
     def __init__(self, root):
@@ -15,9 +36,15 @@ class VehicleSimulatorGUI:
         self.root.configure(bg='#2C3E50')
         
         # Variables
-        self.scenario_var = tk.IntVar(value=1)
+        self.scenario_var = tk.StringVar(value="1")  # built-in scenario number or route file path
+        self.live_view_var = tk.BooleanVar(value=False)
         self.entries = {}
         self.entry_widgets = {}  # Store actual Entry widgets
+        self.simulation_data = None
+        self.results_pyramid = None  # zoom pyramid of the run shown in the graph tabs
+        self.progress_queue = None
+        self.cancel_event = None
+        self.live_graphs = None
         
         # Create main container
         self.main_frame = tk.Frame(root, bg='#2C3E50')
@@ -177,10 +204,12 @@ class VehicleSimulatorGUI:
         scenario_frame.grid(row=row, column=0, columnspan=3, sticky='ew', pady=10, padx=20)
         
         scenarios = [
-            ("Urban Driving (Stop-and-go)", 1),
-            ("Highway Driving (Acceleration/Deceleration)", 2),
-            ("Sport Driving (Variable speed)", 3)
+            ("Urban Driving (Stop-and-go)", "1"),
+            ("Highway Driving (Acceleration/Deceleration)", "2"),
+            ("Sport Driving (Variable speed)", "3")
         ]
+        # Every route file in the routes directory is offered as well
+        scenarios += [(f"Route: {route_name(path)}", path) for path in find_routes()]
         
         for text, value in scenarios:
             rb = tk.Radiobutton(
@@ -199,6 +228,21 @@ class VehicleSimulatorGUI:
         
         row += 1
         
+        live_check = tk.Checkbutton(
+            input_frame,
+            text="Show live graphs while the simulation runs",
+            variable=self.live_view_var,
+            font=('Arial', 11),
+            fg='#ECF0F1',
+            bg='#2C3E50',
+            selectcolor='#2C3E50',
+            activebackground='#2C3E50',
+            activeforeground='#ECF0F1'
+        )
+        live_check.grid(row=row, column=0, columnspan=3, sticky='w', padx=20)
+        
+        row += 1
+        
         # Buttons
         button_frame = tk.Frame(input_frame, bg='#2C3E50')
         button_frame.grid(row=row, column=0, columnspan=3, pady=20)
@@ -317,61 +361,218 @@ class VehicleSimulatorGUI:
             messagebox.showerror("Input Error", str(e))
             return False
     
+    def selected_scenario(self):
+        """Built-in scenario number, or the Route loaded from the selected file"""
+        value = self.scenario_var.get()
+        return int(value) if value.isdigit() else load_route(value)
+    
+    def scenario_label(self, scenario):
+        """Suffix of the results CSV: the scenario number or the route name"""
+        return getattr(scenario, 'name', scenario)
+    
+    @traced
     def run_simulation(self):
-        """Run C++ simulation"""
+        """Start the simulation engine on a background worker"""
         if not self.validate_inputs():
             return
         
         params = {}
         for key, entry in self.entry_widgets.items():
-            params[key] = entry.get()
+            params[key] = float(entry.get())
+        try:
+            scenario = self.selected_scenario()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Route Error", f"Could not load route: {e}")
+            return
+        
+        # Inputs that were run before come straight from the result cache
+        data = result_cache.get(params, scenario)
+        if data is not None:
+            self.finish_simulation(data, scenario)
+            return
         
         # Show loading screen
-        self.show_loading_screen()
+        if self.live_view_var.get():
+            steps, _ = vehicle_engine.trip_steps(scenario, params['distance'], params['speed'])
+            self.show_loading_screen(live_steps=steps)
+        else:
+            self.show_loading_screen()
+        
+        # Run on a background thread; progress comes back through the queue
+        self.progress_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        threading.Thread(
+            target=self.simulation_worker,
+            args=(params, scenario, self.progress_queue, self.cancel_event),
+            daemon=True
+        ).start()
+        self.root.after(PROGRESS_POLL_MS, self.poll_simulation, self.progress_queue, scenario)
+    
+    @traced
+    def simulation_worker(self, params, scenario, progress_queue, cancel_event):
+        """Run the engine chunk by chunk off the Tk thread (no widget access here)"""
+        try:
+            vehicle = vehicle_engine.vehicle_from_params(params)
+            chunks = []
+            for stop, steps, table in vehicle_engine.iter_simulation(
+                vehicle, params['distance'], params['speed'], scenario
+            ):
+                if cancel_event.is_set():
+                    progress_queue.put(('cancelled',))
+                    return
+                chunks.append(table)
+                progress_queue.put((
+                    'progress', stop * 100.0 / steps,
+                    vehicle_engine.progress_message(stop, steps, table), stop, table
+                ))
+            data = SimulationData(np.concatenate(chunks, axis=1)) if chunks else SimulationData()
+            progress_queue.put(('done', data))
+            result_cache.put(params, scenario, data)
+        except Exception as e:
+            progress_queue.put(('error', str(e)))
+    
+    def poll_simulation(self, progress_queue, scenario):
+        """Apply queued worker messages to the loading screen"""
+        if progress_queue is not self.progress_queue:
+            return  # a newer run has replaced this one
         
-        # Prepare input file
         try:
-            with open('vehicle_input.txt', 'w') as f:
-                f.write(f"{params['mass']}\n")
-                f.write(f"{params['width']}\n")
-                f.write(f"{params['height']}\n")
-                f.write(f"{params['length']}\n")
-                f.write(f"{params['efficiency']}\n")
-                f.write(f"{params['distance']}\n")
-                f.write(f"{params['speed']}\n")
-                f.write(f"{self.scenario_var.get()}\n")
-                f.write("1\n")  # Confirmation
-            
-            # Run C++ executable with input file
-            if os.path.exists('vehicle_sim.exe'):
-                with open('vehicle_input.txt', 'r') as input_file:
-                    result = subprocess.run(
-                        ['vehicle_sim.exe'],
-                        stdin=input_file,
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
+            while True:
+                message = progress_queue.get_nowait()
+                kind = message[0]
                 
-                if result.returncode == 0:
-                    self.root.after(1000, self.show_results)
-                else:
-                    messagebox.showerror("Simulation Error", f"C++ simulation failed:\n{result.stderr}")
+                if kind == 'progress':
+                    self.progress_bar['value'] = message[1]
+                    if message[2] is not None:
+                        self.status_label.config(text=message[2])
+                    if self.live_graphs is not None:
+                        self.append_live_chunk(message[3], message[4])
+                elif kind == 'done':
+                    self.progress_queue = None
+                    self.live_graphs = None
+                    self.finish_simulation(message[1], scenario)
+                    return
+                elif kind == 'cancelled':
+                    self.progress_queue = None
+                    self.live_graphs = None
+                    self.show_parameter_input()
+                    return
+                elif kind == 'error':
+                    self.progress_queue = None
+                    self.live_graphs = None
+                    messagebox.showerror("Error", f"Simulation failed: {message[1]}")
                     self.show_parameter_input()
+                    return
+        except queue.Empty:
+            pass
+        
+        if self.live_graphs is not None and time.monotonic() - self.live_drawn_at >= LIVE_FRAME_SECONDS:
+            self.refresh_live_graphs()
+        
+        self.root.after(PROGRESS_POLL_MS, self.poll_simulation, progress_queue, scenario)
+    
+    def finish_simulation(self, data, scenario):
+        """Show a completed run and write it out for the analysis script"""
+        self.simulation_data = data
+        
+        # Keep writing the CSV the analysis script reads, off the Tk thread
+        csv_file = f"vehicle_simulation_scenario_{self.scenario_label(scenario)}.csv"
+        threading.Thread(target=self.export_results, args=(data, csv_file)).start()
+        
+        self.show_results()
+    
+    def cancel_simulation(self):
+        """Ask the running worker to stop after its current chunk"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.status_label.config(text="Cancelling...")
+    
+    def start_live_graphs(self, parent, steps):
+        """Create empty graph tabs that fill in as chunks of the run arrive"""
+        self.live_notebook = ttk.Notebook(parent)
+        self.live_notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        self.live_buffer = np.empty((len(COLUMNS), steps))
+        self.live_filled = 0
+        self.live_drawn_at = 0.0
+        self.live_stale = set()
+        self.live_graphs = []
+        
+        for tab_name, column, scale, ylabel, title, color in LIVE_GRAPH_TABS:
+            ax, line, canvas = self.create_graph_tab(
+                self.live_notebook, tab_name, [], [], "Time (s)", ylabel, title, color
+            )
+            ax.set_xlim(0, max(steps - 1, 1))
+            self.live_graphs.append((COLUMNS.index(column), scale, ax, line, canvas))
+        
+        self.live_notebook.bind('<<NotebookTabChanged>>', lambda event: self.refresh_live_graphs())
+    
+    def append_live_chunk(self, stop, table):
+        """Copy a chunk of the running simulation into the live graph buffer"""
+        self.live_buffer[:, stop - table.shape[1]:stop] = table
+        self.live_filled = stop
+        self.live_stale = set(range(len(self.live_graphs)))
+    
+    @traced
+    def refresh_live_graphs(self):
+        """Update the line on the visible tab in place; hidden tabs catch up when selected"""
+        if self.live_graphs is None:
+            return
+        index = self.live_notebook.index('current')
+        if index in self.live_stale:
+            column, scale, ax, line, canvas = self.live_graphs[index]
+            x, y = downsample(
+                self.live_buffer[COLUMNS.index('time'), :self.live_filled],
+                self.live_buffer[column, :self.live_filled] * scale,
+                axes_point_budget(ax)
+            )
+            line.set_data(x, y)
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+            canvas.draw_idle()
+            self.live_stale.discard(index)
+        self.live_drawn_at = time.monotonic()
+    
+    @traced
+    def export_results(self, data, csv_file):
+        """Write the results CSV and its zoom pyramid and register it with the dataset cache"""
+        save_csv_file(data, csv_file)
+        dataset_cache.put(csv_file, data)
+        save_pyramid(data, csv_file)
+    
+    @traced
+    def get_results_data(self):
+        """Results of the last run, or the scenario CSV through the dataset cache"""
+        if self.simulation_data is not None:
+            return self.simulation_data
+        csv_file = self.results_file()
+        if os.path.exists(csv_file):
+            return load_dataset(csv_file)
+        return None
+    
+    def results_file(self):
+        """Results CSV of the selected scenario"""
+        value = self.scenario_var.get()
+        return f"vehicle_simulation_scenario_{value if value.isdigit() else route_name(value)}.csv"
+    
+    def get_results_pyramid(self, data):
+        """Zoom pyramid of `data`: built in memory for a fresh run, else stored beside its CSV"""
+        if self.results_pyramid is None or self.results_pyramid.data is not data:
+            if data is self.simulation_data:
+                self.results_pyramid = RunPyramid(data)
             else:
-                messagebox.showerror("Error", "vehicle_sim.exe not found. Please compile the C++ code first.")
-                self.show_parameter_input()
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed: {str(e)}")
-            self.show_parameter_input()
+                self.results_pyramid = load_pyramid(self.results_file(), data)
+        return self.results_pyramid
     
-    def show_loading_screen(self):
-        """Display loading screen"""
+    def show_loading_screen(self, live_steps=None):
+        """Display loading screen, with live graphs when live_steps is given"""
         self.clear_frame()
+        self.live_graphs = None
         
         loading_frame = tk.Frame(self.main_frame, bg='#2C3E50')
-        loading_frame.pack(expand=True)
+        if live_steps is None:
+            loading_frame.pack(expand=True)
+        else:
+            loading_frame.pack(pady=10)
         
         loading_label = tk.Label(
             loading_frame,
@@ -382,50 +583,61 @@ class VehicleSimulatorGUI:
         )
         loading_label.pack(pady=20)
         
-        status_label = tk.Label(
+        self.progress_bar = ttk.Progressbar(
+            loading_frame,
+            orient='horizontal',
+            length=400,
+            mode='determinate',
+            maximum=100
+        )
+        self.progress_bar.pack(pady=10)
+        
+        self.status_label = tk.Label(
             loading_frame,
-            text=" ",
+            text="Starting simulation...",
             font=('Arial', 12),
             fg='#95A5A6',
             bg='#2C3E50'
         )
-        status_label.pack(pady=10)
+        self.status_label.pack(pady=10)
         
-        self.root.update()
+        cancel_button = tk.Button(
+            loading_frame,
+            text="CANCEL",
+            font=('Arial', 12, 'bold'),
+            bg='#C0392B',
+            fg='white',
+            activebackground='#A93226',
+            padx=20,
+            pady=10,
+            cursor='hand2',
+            command=self.cancel_simulation
+        )
+        cancel_button.pack(pady=20)
+        
+        if live_steps is not None:
+            self.start_live_graphs(self.main_frame, live_steps)
     
+    @traced
     def show_results(self):
         """Display simulation results"""
         self.clear_frame()
         
         try:
-            # Read results
-            csv_file = f"vehicle_simulation_scenario_{self.scenario_var.get()}.csv"
+            data = self.get_results_data()
             
-            if not os.path.exists(csv_file):
-                messagebox.showerror("Error", f"Results file {csv_file} not found")
+            if data is None or data.get_size() == 0:
+                messagebox.showerror("Error", "No simulation results to display")
                 self.show_parameter_input()
                 return
             
-            # Read CSV and calculate statistics
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
-            
-            if len(data) == 0:
-                messagebox.showerror("Error", "No data in results file")
-                self.show_parameter_input()
-                return
-            
-            # Calculate statistics
-            total_fuel = float(data[-1]['cumulative_fuel'])
-            speeds = [float(row['speed']) for row in data]
-            avg_speed = sum(speeds) / len(speeds)
-            max_speed = max(speeds)
-            
-            # Calculate distance
-            total_distance = sum(float(row['speed']) for row in data[1:])
-            
-            fuel_per_100km = (total_fuel / total_distance) * 100000 if total_distance > 0 else 0
+            # Statistics, memoized on the run
+            total_fuel = data.cumulative_fuel[-1]
+            speed_stats = data.metrics['speed_stats']
+            avg_speed = speed_stats['mean']
+            max_speed = speed_stats['max']
+            total_distance = data.metrics['distance']
+            fuel_per_100km = data.metrics['fuel_consumption']
             
             results = {
                 'Total Fuel': f"{total_fuel:.3f} L",
@@ -516,6 +728,7 @@ class VehicleSimulatorGUI:
             messagebox.showerror("Error", f"Failed to display results: {str(e)}")
             self.show_parameter_input()
     
+    @traced
     def show_graphs(self):
         """Display graphs"""
         self.clear_frame()
@@ -537,31 +750,30 @@ class VehicleSimulatorGUI:
         notebook = ttk.Notebook(self.main_frame)
         notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
-        # Read data
-        csv_file = f"vehicle_simulation_scenario_{self.scenario_var.get()}.csv"
-        
         try:
-            with open(csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
+            data = self.get_results_data()
+            pyramid = self.get_results_pyramid(data)
             
             # Prepare data
-            time = [float(row['time']) for row in data]
-            speed = [float(row['speed']) * 3.6 for row in data]  # Convert to km/h
-            drag = [float(row['drag']) for row in data]
-            fuel = [float(row['cumulative_fuel']) for row in data]
+            time = data.time
+            speed = data.speed * 3.6  # Convert to km/h
+            drag = data.drag
+            fuel = data.cumulative_fuel
             
             # Speed vs Time
             self.create_graph_tab(notebook, "Speed Profile", time, speed, 
-                                "Time (s)", "Speed (km/h)", "Speed vs Time", 'blue')
+                                "Time (s)", "Speed (km/h)", "Speed vs Time", 'blue',
+                                series=pyramid.series('speed', scale=3.6))
             
             # Drag vs Time
             self.create_graph_tab(notebook, "Drag Force", time, drag,
-                                "Time (s)", "Drag Force (N)", "Aerodynamic Drag vs Time", 'red')
+                                "Time (s)", "Drag Force (N)", "Aerodynamic Drag vs Time", 'red',
+                                series=pyramid.series('drag'))
             
             # Fuel vs Time
             self.create_graph_tab(notebook, "Fuel Consumption", time, fuel,
-                                "Time (s)", "Cumulative Fuel (L)", "Fuel Consumption vs Time", 'green')
+                                "Time (s)", "Cumulative Fuel (L)", "Fuel Consumption vs Time", 'green',
+                                series=pyramid.series('cumulative_fuel'))
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load graph data: {str(e)}")
@@ -584,22 +796,43 @@ class VehicleSimulatorGUI:
         )
         back_button.pack()
     
-    def create_graph_tab(self, notebook, tab_name, x_data, y_data, xlabel, ylabel, title, color):
-        """Create a graph tab"""
+    @traced
+    def create_graph_tab(self, notebook, tab_name, x_data, y_data, xlabel, ylabel, title, color,
+                         full_resolution=False, series=None):
+        """Create a graph tab and return its axes, line and canvas.
+        
+        With a run_pyramid series the line is redrawn from the pyramid
+        level that fits the visible x-range whenever the toolbar zooms or
+        pans.
+        """
         tab_frame = tk.Frame(notebook, bg='white')
         notebook.add(tab_frame, text=tab_name)
         
         fig = Figure(figsize=(8, 5), dpi=100)
         ax = fig.add_subplot(111)
-        ax.plot(x_data, y_data, color=color, linewidth=2)
+        if series is None:
+            line, = plot_downsampled(ax, x_data, y_data, color=color, linewidth=2, full_resolution=full_resolution)
+        else:
+            line, = ax.plot(*series.view(*series.x_range, axes_point_budget(ax)), color=color, linewidth=2)
         ax.set_xlabel(xlabel, fontsize=12)
         ax.set_ylabel(ylabel, fontsize=12)
         ax.set_title(title, fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3)
         
         canvas = FigureCanvasTkAgg(fig, master=tab_frame)
+        toolbar = NavigationToolbar2Tk(canvas, tab_frame)
+        toolbar.update()
         canvas.draw()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        if series is not None:
+            ax.callbacks.connect('xlim_changed', lambda ax: self.redraw_series(ax, line, series, canvas))
+        return ax, line, canvas
+    
+    @traced
+    def redraw_series(self, ax, line, series, canvas):
+        """Replace the line with the pyramid view of the visible x-range"""
+        line.set_data(*series.view(*ax.get_xlim(), axes_point_budget(ax)))
+        canvas.draw_idle()
 
 def main():
     root = tk.Tk()